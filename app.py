@@ -1,21 +1,25 @@
 # app.py - Rooted World Tour Registration System
 import streamlit as st
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import io
 import base64
-import plotly.graph_objects as go
-import plotly.express as px
-import numpy as np
 import urllib.parse
 from io import BytesIO
 import re
-import requests
+import html
 import json
-from PIL import Image
 import os
 import tempfile
 import shutil
+import importlib.util
+import csv
+import zipfile
+import random
+import hashlib
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import time
 
 # Page configuration
 st.set_page_config(
@@ -35,32 +39,29 @@ else:
     st.sidebar.warning("⚠️ Auto-checkin from URL requires Streamlit 1.24.0+")
     
 
-# Try to import barcode scanning libraries
+# Probe for barcode scanning libraries without importing them; OpenCV and
+# numpy are only imported on the Check-in page
 # QR Scanning Imports - macOS compatible WITHOUT pyzbar
-try:
-    import cv2
-    import numpy as np
-    BARCODE_SCANNING_AVAILABLE = True
-    print("OpenCV loaded successfully for QR scanning")
-except ImportError:
-    BARCODE_SCANNING_AVAILABLE = False
-    cv2 = None
-    np = None
+BARCODE_SCANNING_AVAILABLE = importlib.util.find_spec("cv2") is not None
+if BARCODE_SCANNING_AVAILABLE:
+    print("OpenCV available for QR scanning")
+else:
     print("OpenCV not available, using fallback methods")
 
-# Try to import Google Drive libraries
-from drive_handler import HybridDatabase
-try:
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import Flow
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-    from google.auth.transport.requests import Request
-    import pickle
-    GOOGLE_DRIVE_AVAILABLE = True
-    print("Google Drive libraries loaded successfully")
-except ImportError:
-    GOOGLE_DRIVE_AVAILABLE = False
+# xlsxwriter writes Excel exports faster and leaner than openpyxl
+XLSXWRITER_AVAILABLE = importlib.util.find_spec("xlsxwriter") is not None
+
+# calamine (Rust) parses uploaded .xlsx files far faster than openpyxl
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+
+# Probe for Google Drive libraries; GoogleDriveManager imports them on first use
+GOOGLE_DRIVE_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("google_auth_oauthlib", "googleapiclient")
+)
+if GOOGLE_DRIVE_AVAILABLE:
+    print("Google Drive libraries available")
+else:
     print("Google Drive libraries not available")
 
 # Import custom modules
@@ -68,56 +69,71 @@ try:
     from database import EventDatabase
     from barcode_generator import BarcodeGenerator
     from utils import (
-        create_dashboard_charts,
+        render_dashboard,
         create_registration_form,
         format_phone,
-        create_sidebar
+        create_sidebar,
+        get_cached_dashboard_stats,
+        current_time_label
     )
 except ImportError:
     # Provide fallback implementations or handle gracefully
     class EventDatabase:
+        data_version = 0
         def get_dashboard_stats(self):
             return {'total': 0, 'checked_in': 0, 'checkin_rate': '0%', 'pending': 0, 'worship_team': 0, 'volunteers': 0}
         def quick_checkin(self, ticket_id):
             return True, ["John", "Doe"]  # Simulate successful check-in
         def get_connection(self):
             return None
+        def get_recent_registrations(self, limit=20):
+            import pandas as pd
+            return pd.DataFrame()
         def add_registration(self, data):
             return True, "Success", "RWT-TEST123", None
         def export_to_csv(self, filepath):
-            # Create sample data
-            data = {
-                'ticket_id': ['RWT-ABC123', 'RWT-DEF456'],
-                'first_name': ['John', 'Jane'],
-                'last_name': ['Doe', 'Smith'],
-                'email': ['john@example.com', 'jane@example.com'],
-                'status': ['checked_in', 'registered']
-            }
-            df = pd.DataFrame(data)
-            df.to_csv(filepath, index=False)
+            # Write sample data
+            with open(filepath, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows([
+                    ['ticket_id', 'first_name', 'last_name', 'email', 'status'],
+                    ['RWT-ABC123', 'John', 'Doe', 'john@example.com', 'checked_in'],
+                    ['RWT-DEF456', 'Jane', 'Smith', 'jane@example.com', 'registered'],
+                ])
             return True
+        def export_to_csv_bytes(self):
+            buf = io.StringIO(newline='')
+            csv.writer(buf).writerows([
+                ['ticket_id', 'first_name', 'last_name', 'email', 'status'],
+                ['RWT-ABC123', 'John', 'Doe', 'john@example.com', 'checked_in'],
+                ['RWT-DEF456', 'Jane', 'Smith', 'jane@example.com', 'registered'],
+            ])
+            return buf.getvalue().encode('utf-8')
         def import_from_csv(self, filepath):
             return True
     
     class BarcodeGenerator:
-        def create_registration_qr(self):
+        base_url = "http://localhost:8501"
+        _templates = {}
+        def _template(self, caption, y):
+            # Static captions are drawn once; callers get a copy to draw on
+            if caption not in self._templates:
+                from PIL import Image, ImageDraw
+                img = Image.new('RGB', (200, 200), color='white')
+                ImageDraw.Draw(img).text((10, y), caption, fill='black')
+                self._templates[caption] = img
+            return self._templates[caption].copy()
+        def create_registration_qr(self, ticket_id=None, registration_url=None):
             # Create a simple image for demo
-            from PIL import Image, ImageDraw
-            img = Image.new('RGB', (200, 200), color='white')
-            d = ImageDraw.Draw(img)
-            d.text((10, 10), "Scan to Register", fill='black')
-            return img
+            return self._template("Scan to Register", 10)
         def img_to_bytes(self, img):
             import io
             img_byte_arr = io.BytesIO()
-            img.save(img_byte_arr, format='PNG')
+            img.save(img_byte_arr, format='PNG', optimize=False, compress_level=1)
             return img_byte_arr.getvalue()
         def create_checkin_qr(self, ticket_id):
-            from PIL import Image, ImageDraw
-            img = Image.new('RGB', (200, 200), color='white')
-            d = ImageDraw.Draw(img)
-            d.text((10, 10), f"Ticket: {ticket_id}", fill='black')
-            d.text((10, 30), "Scan to Check-in", fill='black')
+            from PIL import ImageDraw
+            img = self._template("Scan to Check-in", 30)
+            ImageDraw.Draw(img).text((10, 10), f"Ticket: {ticket_id}", fill='black')
             return img
         def generate_ticket_id(self, prefix):
             import random
@@ -125,8 +141,8 @@ except ImportError:
             chars = string.ascii_uppercase + string.digits
             return f"{prefix}-{''.join(random.choices(chars, k=8))}"
     
-    def create_dashboard_charts(stats, df):
-        return {}
+    def render_dashboard(stats, df):
+        st.info("Charts not available")
     
     def create_registration_form():
         # Simple form for demo
@@ -165,6 +181,12 @@ except ImportError:
     def format_phone(phone):
         return phone
     
+    def get_cached_dashboard_stats(_db):
+        return _db.get_dashboard_stats()
+    
+    def current_time_label():
+        return time.strftime("%I:%M %p")
+    
     def create_sidebar():
         st.sidebar.markdown("""
         <div style="text-align: center; margin-bottom: 2rem;">
@@ -199,23 +221,36 @@ except ImportError:
         
         return selected
 
+# Drive batches accept at most 100 calls; retries back off on 429/5xx responses
+DRIVE_BATCH_LIMIT = 100
+DRIVE_NUM_RETRIES = 5
+DRIVE_CHUNK_SIZE = 8 * 1024 * 1024
+
 # Google Drive Manager Class
 class GoogleDriveManager:
     def __init__(self):
         self.SCOPES = ['https://www.googleapis.com/auth/drive.file']
-        self.token_file = 'token.pickle'
+        self.token_file = 'token.json'
         self.credentials = None
+        self._service = None
         
     def authenticate(self):
         """Authenticate with Google Drive"""
         if not GOOGLE_DRIVE_AVAILABLE:
             return False, "Google Drive libraries not installed. Install with: pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client"
         
+        # Credentials may be reloaded or refreshed below; rebuild the service after
+        self._service = None
+        
         try:
+            from google_auth_oauthlib.flow import Flow
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+            
             # Check for existing credentials
             if os.path.exists(self.token_file):
-                with open(self.token_file, 'rb') as token:
-                    self.credentials = pickle.load(token)
+                with open(self.token_file, 'r') as token:
+                    self.credentials = Credentials.from_authorized_user_info(json.load(token), self.SCOPES)
             
             # If no valid credentials, authenticate
             if not self.credentials or not self.credentials.valid:
@@ -246,8 +281,8 @@ class GoogleDriveManager:
                         self.credentials = flow.credentials
                         
                         # Save credentials
-                        with open(self.token_file, 'wb') as token:
-                            pickle.dump(self.credentials, token)
+                        with open(self.token_file, 'w') as token:
+                            token.write(self.credentials.to_json())
                         
                         return True, "Authentication successful!"
                     else:
@@ -262,12 +297,48 @@ class GoogleDriveManager:
     
     def get_service(self):
         """Get Google Drive service instance"""
-        if self.credentials:
-            return build('drive', 'v3', credentials=self.credentials)
-        return None
+        if self._service is None and self.credentials:
+            from googleapiclient.discovery import build
+            self._service = build('drive', 'v3', credentials=self.credentials,
+                                  cache_discovery=False)
+        return self._service
     
-    def upload_file(self, file_path, file_name, folder_id=None):
+    def upload_file(self, file_path, file_name, folder_id=None, service=None):
         """Upload a file to Google Drive"""
+        try:
+            service = service or self.get_service()
+            if not service:
+                return False, "Not authenticated"
+            
+            file_metadata = {'name': file_name}
+            if folder_id:
+                file_metadata['parents'] = [folder_id]
+            
+            from googleapiclient.http import MediaFileUpload
+            media = MediaFileUpload(
+                file_path,
+                mimetype='application/octet-stream',
+                chunksize=DRIVE_CHUNK_SIZE,
+                resumable=True
+            )
+            request = service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            )
+            
+            # Send in large chunks; each chunk retries with backoff on 429/5xx
+            file = None
+            while file is None:
+                _, file = request.next_chunk(num_retries=DRIVE_NUM_RETRIES)
+            
+            return True, f"File uploaded successfully! File ID: {file.get('id')}"
+            
+        except Exception as e:
+            return False, f"Upload error: {str(e)}"
+    
+    def upload_bytes(self, data, file_name, mimetype='text/csv', folder_id=None):
+        """Upload in-memory content to Google Drive in a single request"""
         try:
             service = self.get_service()
             if not service:
@@ -277,18 +348,132 @@ class GoogleDriveManager:
             if folder_id:
                 file_metadata['parents'] = [folder_id]
             
-            media = MediaFileUpload(file_path, mimetype='application/octet-stream')
+            # Backups are small, so a simple upload saves the resumable session round trip
+            from googleapiclient.http import MediaIoBaseUpload
+            media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype, resumable=False)
             file = service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id'
-            ).execute()
+            ).execute(num_retries=DRIVE_NUM_RETRIES)
             
             return True, f"File uploaded successfully! File ID: {file.get('id')}"
             
         except Exception as e:
             return False, f"Upload error: {str(e)}"
     
+    def upload_files(self, items, folder_id=None, max_workers=4):
+        """Upload several (file_path, file_name) pairs concurrently"""
+        import threading
+        
+        if not self.credentials:
+            return [(False, "Not authenticated") for _ in items]
+        
+        from googleapiclient.discovery import build
+        local = threading.local()
+        
+        def _upload(file_path, file_name):
+            # httplib2 isn't thread-safe, so each worker builds its own service
+            if not hasattr(local, 'service'):
+                local.service = build('drive', 'v3', credentials=self.credentials)
+            return self.upload_file(file_path, file_name, folder_id, service=local.service)
+        
+        # Media uploads can't be batched, so overlap their round trips instead
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_upload, file_path, file_name)
+                for file_path, file_name in items
+            ]
+            return [future.result() for future in futures]
+    
+    def _run_batch(self, service, requests):
+        """Execute (request_id, request) pairs in Drive batches of up to 100"""
+        responses = {}
+        errors = []
+        
+        def _collect(request_id, response, exception):
+            if exception is not None:
+                errors.append(f"{request_id}: {exception}")
+            else:
+                responses[request_id] = response
+        
+        for start in range(0, len(requests), DRIVE_BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=_collect)
+            for request_id, request in requests[start:start + DRIVE_BATCH_LIMIT]:
+                batch.add(request, request_id=request_id)
+            batch.execute()
+        
+        return responses, errors
+    
+    def batch_set_permissions(self, file_ids, permission):
+        """Apply one permission to many files using batched requests"""
+        try:
+            service = self.get_service()
+            if not service:
+                return False, "Not authenticated"
+            
+            _, errors = self._run_batch(service, [
+                (file_id, service.permissions().create(fileId=file_id, body=permission, fields='id'))
+                for file_id in file_ids
+            ])
+            
+            if errors:
+                return False, f"Permission errors: {'; '.join(errors)}"
+            return True, f"Permissions updated on {len(file_ids)} files"
+            
+        except Exception as e:
+            return False, f"Permission error: {str(e)}"
+    
+    def batch_create_folders(self, folder_names, parent_id=None):
+        """Create several folders in batched requests; returns name -> folder ID"""
+        try:
+            service = self.get_service()
+            if not service:
+                return {}, "Not authenticated"
+            
+            requests = []
+            for i, folder_name in enumerate(folder_names):
+                file_metadata = {
+                    'name': folder_name,
+                    'mimeType': 'application/vnd.google-apps.folder'
+                }
+                if parent_id:
+                    file_metadata['parents'] = [parent_id]
+                requests.append((str(i), service.files().create(body=file_metadata, fields='id')))
+            
+            responses, errors = self._run_batch(service, requests)
+            folders = {
+                folder_names[int(request_id)]: response.get('id')
+                for request_id, response in responses.items()
+            }
+            
+            if errors:
+                return folders, f"Error creating folders: {'; '.join(errors)}"
+            return folders, None
+            
+        except Exception as e:
+            return {}, f"Error creating folders: {str(e)}"
+    
+    def batch_get_metadata(self, file_ids, fields="id, name, createdTime, size"):
+        """Fetch metadata for several files in batched requests"""
+        try:
+            service = self.get_service()
+            if not service:
+                return [], "Not authenticated"
+            
+            responses, errors = self._run_batch(service, [
+                (file_id, service.files().get(fileId=file_id, fields=fields))
+                for file_id in file_ids
+            ])
+            files = [responses[file_id] for file_id in file_ids if file_id in responses]
+            
+            if errors:
+                return files, f"Error fetching metadata: {'; '.join(errors)}"
+            return files, None
+            
+        except Exception as e:
+            return [], f"Error fetching metadata: {str(e)}"
+    
     def download_file(self, file_id, destination_path):
         """Download a file from Google Drive"""
         try:
@@ -296,20 +481,18 @@ class GoogleDriveManager:
             if not service:
                 return False, "Not authenticated"
             
+            from googleapiclient.http import MediaIoBaseDownload
             request = service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-                if status:
-                    st.write(f"Download progress: {int(status.progress() * 100)}%")
-            
-            fh.seek(0)
             
+            # Write chunks straight to disk instead of buffering the whole file
             with open(destination_path, 'wb') as f:
-                f.write(fh.read())
+                downloader = MediaIoBaseDownload(f, request, chunksize=DRIVE_CHUNK_SIZE)
+                
+                done = False
+                while not done:
+                    status, done = downloader.next_chunk(num_retries=DRIVE_NUM_RETRIES)
+                    if status:
+                        st.write(f"Download progress: {int(status.progress() * 100)}%")
             
             return True, "File downloaded successfully!"
             
@@ -323,15 +506,17 @@ class GoogleDriveManager:
             if not service:
                 return [], "Not authenticated"
             
-            query = "mimeType != 'application/vnd.google-apps.folder'"
+            query = "mimeType != 'application/vnd.google-apps.folder' and trashed = false"
             if folder_id:
                 query = f"'{folder_id}' in parents and {query}"
             
+            # Only the fields the restore list shows, newest first, one page
             results = service.files().list(
                 q=query,
                 pageSize=10,
+                orderBy="createdTime desc",
                 fields="files(id, name, createdTime, size)"
-            ).execute()
+            ).execute(num_retries=DRIVE_NUM_RETRIES)
             
             files = results.get('files', [])
             return files, None
@@ -359,6 +544,10 @@ class GoogleDriveManager:
         except Exception as e:
             return False, f"Error creating folder: {str(e)}"
 
+# Ticket ID pattern used when QR data is neither a check-in URL nor a bare ID
+TICKET_ID_PATTERN = re.compile(r'([A-Z]{2,4}-[A-Z0-9]{6,12})')
+TICKET_PREFIXES = ('RWT-', 'VIP-', 'WT-', 'VOL-', 'STAFF-')
+
 # Helper method for extracting ticket ID from QR data
 def _extract_ticket_id(qr_data):
     """Extract ticket ID from QR code data"""
@@ -366,27 +555,244 @@ def _extract_ticket_id(qr_data):
         return None
     
     # If it's a URL with ticket parameter
-    if "?ticket=" in qr_data:
-        try:
-            parsed = urllib.parse.urlparse(qr_data)
-            params = urllib.parse.parse_qs(parsed.query)
-            return params.get('ticket', [None])[0]
-        except:
-            pass
+    if "ticket=" in qr_data:
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(qr_data).query)
+        if params.get('ticket'):
+            return params['ticket'][0]
     
     # If it's just a ticket ID (starts with RWT-, VIP-, etc.)
-    if qr_data.startswith(('RWT-', 'VIP-', 'WT-', 'VOL-', 'STAFF-')):
+    if qr_data.startswith(TICKET_PREFIXES):
         return qr_data
     
     # Try to find ticket ID pattern in the string
-    match = re.search(r'([A-Z]{2,4}-[A-Z0-9]{6,12})', qr_data)
+    match = TICKET_ID_PATTERN.search(qr_data)
     if match:
         return match.group(1)
     
     return None
 
+def _binarize(gray):
+    """Otsu-threshold a grayscale frame so faint or glary codes decode"""
+    import cv2
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+# Optional WeChat detector models (opencv-contrib-python); download
+# detect/sr .prototxt and .caffemodel files from opencv_3rdparty into here
+WECHAT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "wechat_qrcode")
+WECHAT_MODEL_FILES = ("detect.prototxt", "detect.caffemodel", "sr.prototxt", "sr.caffemodel")
+
+# Long edge, in pixels, of the first detection pass
+QR_DETECT_MAX_SIDE = 800
+
+def _new_qr_detector():
+    """WeChat CNN detector when its models are available, else the stock detector"""
+    import cv2
+    
+    paths = [os.path.join(WECHAT_MODEL_DIR, name) for name in WECHAT_MODEL_FILES]
+    if hasattr(cv2, 'wechat_qrcode_WeChatQRCode') and all(os.path.exists(p) for p in paths):
+        try:
+            return cv2.wechat_qrcode_WeChatQRCode(*paths)
+        except cv2.error as e:
+            print(f"WeChat QR detector unavailable: {e}")
+    return cv2.QRCodeDetector()
+
+def _decode_qr(img):
+    """Decode QR data from a grayscale or BGR image, trying OpenCV before pyzbar"""
+    import cv2
+    
+    # Reuse one detector per session instead of building one per frame
+    if 'qr_detector' not in st.session_state:
+        st.session_state.qr_detector = _new_qr_detector()
+    detector = st.session_state.qr_detector
+    
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    # A quiet zone around the frame helps codes that touch the edge
+    gray = cv2.copyMakeBorder(gray, 30, 30, 30, 30, cv2.BORDER_CONSTANT, value=255)
+    
+    # Detection cost grows with pixel count, so try a downscaled frame first
+    # and only fall back to full resolution when that finds nothing
+    candidates = [gray]
+    scale = QR_DETECT_MAX_SIDE / max(gray.shape[:2])
+    if scale < 1:
+        candidates.insert(0, cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+    
+    for frame in candidates:
+        if isinstance(detector, cv2.QRCodeDetector):
+            # One finder-pattern pass covers every code in the frame
+            found, datas, _, _ = detector.detectAndDecodeMulti(frame)
+            results = [data for data in datas if data] if found else []
+        else:
+            results, _ = detector.detectAndDecode(frame)
+            results = [data for data in results if data]
+        if results:
+            return results
+    
+    # Fall back to pyzbar only when OpenCV finds nothing, on the small frame:
+    # as-is, Otsu-binarized, then inverted for light-on-dark screenshots
+    try:
+        from pyzbar.pyzbar import decode
+    except ImportError:
+        return []
+    small = candidates[0]
+    binary = _binarize(small)
+    for trial in (small, binary, cv2.bitwise_not(binary)):
+        results = [obj.data.decode('utf-8') for obj in decode(trial)]
+        if results:
+            return results
+    return []
+
+# Served by Streamlit at app/static/... when server.enableStaticServing is on
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+REGISTRATION_QR_FILE = "registration_qr.png"
+
+@st.cache_data(show_spinner=False)
+def _build_registration_qr(url):
+    """PNG bytes of the mobile registration QR, built once per URL for all sessions"""
+    img = BarcodeGenerator().create_registration_qr(registration_url=url)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=False, compress_level=1)
+    return buf.getvalue()
+
+def _publish_registration_qr(png):
+    """Keep the static copy of the registration QR current; returns False if it can't be written"""
+    # Outside the cached builder: a cache hit must still find the file on disk
+    path = os.path.join(STATIC_DIR, REGISTRATION_QR_FILE)
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == png:
+                return True
+    except OSError:
+        pass
+    try:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(png)
+    except OSError as e:
+        print(f"Could not write static registration QR: {e}")
+        return False
+    return True
+
+@st.cache_data(show_spinner=False)
+def _build_example_checkin_qr():
+    """PNG bytes of the sample check-in QR shown on the Mobile Check-in tab"""
+    img = BarcodeGenerator().create_checkin_qr("RWT-EXAMPLE")
+    if img is None:
+        return None
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=False, compress_level=1)
+    return buf.getvalue()
+
+# Static HTML fragments; dynamic fields are filled in with str.format
+HOME_HEADER_HTML = """
+<div class="main-header">
+    <h1>ROOTED WORLD TOUR</h1>
+    <h2>WORSHIP COURT LAGOS • MOBILE REGISTRATION SYSTEM</h2>
+</div>
+"""
+
+REGISTRATION_QR_TEMPLATE = """
+<div class="qr-container">
+    <img src="{qr_src}" alt="Scan to register" style="max-width: 100%;"/>
+    <p style="color: #666; margin: 0.5rem 0 0 0;">Scan to register on mobile</p>
+</div>
+"""
+
+RECENT_REGISTRATIONS_TEMPLATE = """
+<div style="background: #1a1a2e; padding: 1rem; border-radius: 10px;">
+    <table style="width: 100%; color: white; border-collapse: collapse;">
+        <tr>
+            <th style="text-align: left; padding: 8px;">Ticket ID</th>
+            <th style="text-align: left; padding: 8px;">Name</th>
+            <th style="text-align: left; padding: 8px;">Status</th>
+            <th style="text-align: left; padding: 8px;">Time</th>
+        </tr>
+        {rows}
+    </table>
+</div>
+"""
+
+RECENT_REGISTRATION_ROW = (
+    '<tr><td style="padding: 8px;">{ticket_id}</td>'
+    '<td style="padding: 8px;">{name}</td>'
+    '<td style="padding: 8px;"><span class="status-badge status-{status}">{status_label}</span></td>'
+    '<td style="padding: 8px;">{time}</td></tr>'
+)
+
+CHECKIN_SUCCESS_TEMPLATE = """
+<div style="text-align: center; padding: 40px 20px;">
+    <h1 style="color: #4CAF50; font-size: 3rem;">✅</h1>
+    <h2 style="color: #1a5319;">Check-in Successful!</h2>
+    <p style="font-size: 1.2rem; color: #333;">
+        Welcome to Rooted World Tour,<br>
+        <strong>{first_name} {last_name}</strong>
+    </p>
+    <div style="background: #f0f9f0; padding: 20px; border-radius: 10px; margin: 20px 0;">
+        <p style="margin: 0;">🎫 <strong>Ticket ID:</strong> {ticket_id}</p>
+        <p style="margin: 10px 0 0 0;">🕐 <strong>Time:</strong> {time}</p>
+    </div>
+    <p style="color: #666; font-size: 0.9rem;">
+        Enjoy the WORSHIP COURT LAGOS!<br>
+        Please proceed to the main auditorium.
+    </p>
+</div>
+"""
+
+TICKET_TEXT_TEMPLATE = """ROOTED WORLD TOUR - WORSHIP NIGHT
+
+Ticket ID: {ticket_id}
+Name: {first_name} {last_name}
+Email: {email}
+
+Instructions:
+1. Present this ticket at entry
+2. Staff will scan your QR code
+3. Keep this ticket for reference
+
+For questions: info@rootedworldtour.com
+"""
+
+AUTO_REDIRECT_SCRIPT = """
+<script>
+    setTimeout(function() {
+        window.location.href = "/";
+    }, 5000);
+</script>
+"""
+
+FOOTER_HTML = """
+<div style="text-align: center; color: #666; font-size: 0.9em; padding: 20px 0;">
+    <p><strong>Rooted World Tour Emergency Registration System • v3.0</strong></p>
+    <p>Mobile Registration & QR Code Check-in System</p>
+    <p>For support: tech@rootedworldtour.com • (555) 123-HELP</p>
+    <p style="font-size: 0.8em; margin-top: 10px;">
+        🛠️ Built with Streamlit • 📱 Mobile Optimized • 🔒 Secure • ☁️ Google Drive Sync
+    </p>
+</div>
+"""
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _recent_registrations_html(_db, data_version, limit=10):
+    """Recent registrations table for the Home page, rebuilt at most every few seconds"""
+    import pandas as pd
+    df = _db.get_recent_registrations(limit=limit)
+    if df.empty:
+        return ""
+    
+    rows = "".join(
+        RECENT_REGISTRATION_ROW.format(
+            ticket_id=html.escape(str(r['ticket_id'])),
+            name=html.escape(f"{r['first_name']} {r['last_name']}"),
+            status=html.escape(str(r['status'])),
+            status_label=html.escape(str(r['status']).replace('_', ' ').title()),
+            time=r['reg_time'].strftime("%I:%M %p") if pd.notna(r['reg_time']) else "",
+        )
+        for r in df.to_dict('records')
+    )
+    return RECENT_REGISTRATIONS_TEMPLATE.format(rows=rows)
+
 # Custom CSS
-st.markdown("""
+APP_CSS = """
 <style>
     /* Main header styling */
     .main-header {
@@ -545,99 +951,217 @@ st.markdown("""
         display: inline-block;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Comments and indentation are stripped once at import rather than sent on every rerun
+APP_CSS = re.sub(r"/\*.*?\*/|\n\s*", "", APP_CSS, flags=re.S)
+
+# Streamlit drops elements that aren't re-emitted, so the style block is sent each run
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# Database and QR generator are shared by all sessions; Drive credentials stay per session
+@st.cache_resource
+def _get_db():
+    return EventDatabase()
+
+@st.cache_resource
+def _get_barcode_gen():
+    return BarcodeGenerator()
 
 # Initialize session state
-if 'db' not in st.session_state:
-    st.session_state.db = EventDatabase()
-if 'barcode_gen' not in st.session_state:
-    st.session_state.barcode_gen = BarcodeGenerator()
-if 'scan_history' not in st.session_state:
-    st.session_state.scan_history = []
-if 'last_scanned' not in st.session_state:
-    st.session_state.last_scanned = None
-if 'page' not in st.session_state:
-    st.session_state.page = "Home"
-if 'camera_active' not in st.session_state:
-    st.session_state.camera_active = False
-if 'drive_manager' not in st.session_state:
-    st.session_state.drive_manager = GoogleDriveManager()
-if 'google_auth_status' not in st.session_state:
-    st.session_state.google_auth_status = "Not connected"
-if 'google_auth_message' not in st.session_state:
-    st.session_state.google_auth_message = ""
+SESSION_DEFAULTS = {
+    'last_scanned': None,
+    'page': "Home",
+    'sidebar_page': None,
+    'camera_active': False,
+    'google_auth_status': "Not connected",
+    'google_auth_message': "",
+    'fast_mode': False
+}
+
+# Scan history only feeds the recent-scans panel, so old entries are evicted
+SCAN_HISTORY_LIMIT = 500
+
+# Test ticket IDs for the simulated Camera Live detection
+SIMULATED_TICKETS = ("RWT-ABC123", "RWT-DEF456", "VIP-GHI789", "WT-JKL012", "VOL-MNO345")
+
+SCAN_METHOD_ICONS = {
+    'webcam': '📷',
+    'upload': '📁',
+    'manual': '⌨️',
+    'camera': '📸',
+    'camera_manual': '📸✍️',
+    'auto_qr': '🔗'
+}
+
+# Export types that filter on registration status
+EXPORT_STATUS_FILTERS = {
+    "Checked-in Only": 'checked_in',
+    "Pending Check-in": 'registered'
+}
+
+SESSION_FACTORIES = {
+    'scan_history': lambda: deque(maxlen=SCAN_HISTORY_LIMIT),
+    'db': _get_db,
+    'barcode_gen': _get_barcode_gen,
+    'drive_manager': GoogleDriveManager
+}
+
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+for key, factory in SESSION_FACTORIES.items():
+    if key not in st.session_state:
+        st.session_state[key] = factory()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _lookup_ticket(_db, data_version, ticket_id):
+    """Attendee lookup shared across reruns; any write to registrations bumps data_version"""
+    return _db.get_attendee(ticket_id)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_registrations(_db, data_version):
+    """Full registrations table for the dashboard, or None without a database"""
+    import pandas as pd
+    
+    conn = _db.get_connection()
+    if not conn:
+        return None
+    try:
+        df = pd.read_sql_query("SELECT * FROM registrations", conn)
+    finally:
+        conn.close()
+    
+    # Parse timestamps once here rather than on every dashboard render
+    df['registration_time'] = pd.to_datetime(df['registration_time'], format='ISO8601', errors='coerce')
+    df['hour'] = df['registration_time'].dt.hour
+    
+    # Flags only need a byte
+    for flag in ('worship_team', 'volunteer'):
+        df[flag] = df[flag].fillna(0).astype('int8')
+    return df
+
+@st.cache_data(ttl=30, show_spinner=False, max_entries=16)
+def _filtered_csv(_df, data_version, fingerprint, status_filter, search_term):
+    """CSV bytes of a dashboard view, keyed by the data version, a row-hash
+    fingerprint of the frame and the filters rather than by pickling the frame"""
+    buf = io.BytesIO()
+    _df.to_csv(buf, index=False)
+    return buf.getvalue()
+
+# Dashboard figures are cached on their plotted values, so reruns that
+# don't change the data skip plotly's figure construction
+@st.cache_data(show_spinner=False)
+def _hourly_bar_figure(hour_counts):
+    import plotly.express as px
+    hours, counts = zip(*hour_counts) if hour_counts else ((), ())
+    return px.bar(
+        x=list(hours),
+        y=list(counts),
+        title="Registrations by Hour",
+        labels={'x': 'Hour of Day', 'y': 'Registrations'},
+        color_discrete_sequence=['#4CAF50']
+    )
+
+@st.cache_data(show_spinner=False)
+def _team_bar_figure(attendees, worship_team, volunteers):
+    import plotly.express as px
+    return px.bar(
+        x=['Attendees', 'Worship Team', 'Volunteers'],
+        y=[attendees, worship_team, volunteers],
+        title="Team Distribution",
+        labels={'x': 'Team', 'y': 'Count', 'color': 'Team'},
+        color=['Attendees', 'Worship Team', 'Volunteers'],
+        color_discrete_sequence=['#4CAF50', '#2196F3', '#FF9800']
+    )
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _database_info(_db, data_version):
+    """Settings-tab database summary, so typing in the reset form doesn't re-query"""
+    return _db.get_database_info()
+
+def _go_to(page):
+    """Button callback; runs before the rerun, so no second st.rerun() is needed"""
+    st.session_state.page = page
+
+def _celebrate():
+    """Balloons, unless the operator has switched on high-throughput mode"""
+    if not st.session_state.fast_mode:
+        st.balloons()
+
+def _build_tickets_zip(tickets):
+    """Bundle every generated ticket's QR code into a single ZIP archive"""
+    buf = io.BytesIO()
+    # PNG data is already deflated, so store entries rather than recompress them
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_STORED) as zf:
+        for ticket in tickets:
+            zf.writestr(f"ticket_{ticket['ticket_id']}.png", ticket['qr_bytes'])
+    return buf.getvalue()
+
+def _read_excel_upload(uploaded_file):
+    """First sheet of an uploaded workbook as a DataFrame, via calamine when installed"""
+    import pandas as pd
+    
+    if not CALAMINE_AVAILABLE:
+        return pd.read_excel(uploaded_file)
+    
+    # pandas 2.0 has no calamine engine, so build the frame from the rows directly
+    from python_calamine import CalamineWorkbook
+    rows = CalamineWorkbook.from_filelike(uploaded_file).get_sheet_by_index(0).to_python()
+    if not rows:
+        return pd.DataFrame()
+    # Excel stores every number as a float; keep whole numbers (phones) integral
+    body = [
+        [int(v) if isinstance(v, float) and v.is_integer() else v for v in row]
+        for row in rows[1:]
+    ]
+    return pd.DataFrame(body, columns=[str(c) for c in rows[0]])
 
 # ==================== AUTO-CHECKIN FROM MOBILE CAMERA ====================
 # Handle auto-checkin from mobile camera scans
-query_params = st.query_params
-
 # Check if we have ticket and action parameters (from mobile camera scan)
-if 'ticket' in query_params and 'action' in query_params:
-    ticket_id = query_params['ticket'][0] if isinstance(query_params['ticket'], list) else query_params['ticket']
-    action = query_params['action'][0] if isinstance(query_params['action'], list) else query_params['action']
-    
-    if action == 'checkin':
-        # Clear parameters to prevent looping
-        st.query_params.clear()
-        
-        # Process the check-in
-        with st.spinner(f"Checking in ticket {ticket_id}..."):
-            success, attendee = st.session_state.db.quick_checkin(ticket_id)
+ticket_id = query_params.get('ticket')
+if ticket_id and query_params.get('action') == 'checkin':
+    # Clear parameters to prevent looping
+    st.query_params.clear()
+    
+    # Process the check-in
+    with st.spinner(f"Checking in ticket {ticket_id}..."):
+        success, attendee = st.session_state.db.quick_checkin(ticket_id)
+        
+        if success:
+            # Show success page optimized for mobile
+            st.markdown(CHECKIN_SUCCESS_TEMPLATE.format(
+                first_name=attendee[0],
+                last_name=attendee[1],
+                ticket_id=ticket_id,
+                time=current_time_label()
+            ), unsafe_allow_html=True)
             
-            if success:
-                # Show success page optimized for mobile
-                st.markdown(f"""
-                <div style="text-align: center; padding: 40px 20px;">
-                    <h1 style="color: #4CAF50; font-size: 3rem;">✅</h1>
-                    <h2 style="color: #1a5319;">Check-in Successful!</h2>
-                    <p style="font-size: 1.2rem; color: #333;">
-                        Welcome to Rooted World Tour,<br>
-                        <strong>{attendee[0]} {attendee[1]}</strong>
-                    </p>
-                    <div style="background: #f0f9f0; padding: 20px; border-radius: 10px; margin: 20px 0;">
-                        <p style="margin: 0;">🎫 <strong>Ticket ID:</strong> {ticket_id}</p>
-                        <p style="margin: 10px 0 0 0;">🕐 <strong>Time:</strong> {datetime.now().strftime("%I:%M %p")}</p>
-                    </div>
-                    <p style="color: #666; font-size: 0.9rem;">
-                        Enjoy the WORSHIP COURT LAGOS!<br>
-                        Please proceed to the main auditorium.
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Add celebration effect
-                st.balloons()
-                
-                # Auto-redirect after 5 seconds
-                st.markdown("""
-                <script>
-                    setTimeout(function() {
-                        window.location.href = "/";
-                    }, 5000);
-                </script>
-                """, unsafe_allow_html=True)
-                
-                # Stop further page rendering
-                st.stop()
-            else:
-                st.error(f"❌ Ticket {ticket_id} not found or already checked in")
+            # Add celebration effect
+            _celebrate()
+            
+            # Auto-redirect after 5 seconds
+            if not st.session_state.fast_mode:
+                st.markdown(AUTO_REDIRECT_SCRIPT, unsafe_allow_html=True)
+            
+            # Stop further page rendering
+            st.stop()
+        else:
+            st.error(f"❌ Ticket {ticket_id} not found or already checked in")
 
 # Create sidebar and get selected page
 selected_page = create_sidebar()
 
-# Update page based on sidebar selection
-if selected_page != st.session_state.page:
+# Follow the sidebar only when its selection changes, so Quick Action
+# navigation isn't overwritten by the unchanged menu on the next rerun
+if selected_page != st.session_state.sidebar_page:
+    st.session_state.sidebar_page = selected_page
     st.session_state.page = selected_page
 
 # ==================== HOME PAGE ====================
 if st.session_state.page == "Home":
     # Hero Section
-    st.markdown("""
-    <div class="main-header">
-        <h1>ROOTED WORLD TOUR</h1>
-        <h2>WORSHIP COURT LAGOS • MOBILE REGISTRATION SYSTEM</h2>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(HOME_HEADER_HTML, unsafe_allow_html=True)
     
     # Alert Banner
     st.info("""
@@ -651,29 +1175,25 @@ if st.session_state.page == "Home":
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        if st.button("📝 New Registration", use_container_width=True):
-            st.session_state.page = "Register"
-            st.rerun()
+        st.button("📝 New Registration", use_container_width=True,
+                  on_click=_go_to, args=("Register",))
     
     with col2:
-        if st.button("✅ QR Code Check-in", use_container_width=True):
-            st.session_state.page = "Check-in"
-            st.rerun()
+        st.button("✅ QR Code Check-in", use_container_width=True,
+                  on_click=_go_to, args=("Check-in",))
     
     with col3:
-        if st.button("📊 View Dashboard", use_container_width=True):
-            st.session_state.page = "Dashboard"
-            st.rerun()
+        st.button("📊 View Dashboard", use_container_width=True,
+                  on_click=_go_to, args=("Dashboard",))
     
     with col4:
-        if st.button("🎫 Manage Tickets", use_container_width=True):
-            st.session_state.page = "Manage"
-            st.rerun()
+        st.button("🎫 Manage Tickets", use_container_width=True,
+                  on_click=_go_to, args=("Manage",))
     
     # Stats Overview
     st.subheader("📈 Live Event Statistics")
     
-    stats = st.session_state.db.get_dashboard_stats()
+    stats = get_cached_dashboard_stats(st.session_state.db)
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -700,37 +1220,11 @@ if st.session_state.page == "Home":
     # Recent Activity
     st.subheader("🕐 Recent Registrations")
     
-    # Simulate recent registrations
-    st.markdown("""
-    <div style="background: #1a1a2e; padding: 1rem; border-radius: 10px;">
-        <table style="width: 100%; color: white; border-collapse: collapse;">
-            <tr>
-                <th style="text-align: left; padding: 8px;">Ticket ID</th>
-                <th style="text-align: left; padding: 8px;">Name</th>
-                <th style="text-align: left; padding: 8px;">Status</th>
-                <th style="text-align: left; padding: 8px;">Time</th>
-            </tr>
-            <tr>
-                <td style="padding: 8px;">RWT-ABC123</td>
-                <td style="padding: 8px;">John Doe</td>
-                <td style="padding: 8px;"><span class="status-badge status-checked_in">Checked In</span></td>
-                <td style="padding: 8px;">08:30 PM</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px;">RWT-DEF456</td>
-                <td style="padding: 8px;">Jane Smith</td>
-                <td style="padding: 8px;"><span class="status-badge status-registered">Registered</span></td>
-                <td style="padding: 8px;">08:25 PM</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px;">VIP-GHI789</td>
-                <td style="padding: 8px;">Bob Johnson</td>
-                <td style="padding: 8px;"><span class="status-badge status-checked_in">Checked In</span></td>
-                <td style="padding: 8px;">08:15 PM</td>
-            </tr>
-        </table>
-    </div>
-    """, unsafe_allow_html=True)
+    recent_html = _recent_registrations_html(st.session_state.db, st.session_state.db.data_version)
+    if recent_html:
+        st.markdown(recent_html, unsafe_allow_html=True)
+    else:
+        st.info("No registrations yet")
     
     # Mobile Registration QR Code Section
     st.subheader("📱 Mobile Registration QR")
@@ -739,14 +1233,17 @@ if st.session_state.page == "Home":
     
     with col1:
         # Generate QR code that links directly to registration page
-        registration_qr = st.session_state.barcode_gen.create_registration_qr()
-        if registration_qr:
-            st.markdown('<div class="qr-container">', unsafe_allow_html=True)
-            st.image(registration_qr, caption="Scan to register on mobile")
-            st.markdown('</div>', unsafe_allow_html=True)
+        registration_url = f"{st.session_state.barcode_gen.base_url}/?page=Register"
+        qr_bytes = _build_registration_qr(registration_url)
+        if qr_bytes:
+            # Browsers can cache the static file over HTTP
+            if st.get_option("server.enableStaticServing") and _publish_registration_qr(qr_bytes):
+                qr_src = f"app/static/{REGISTRATION_QR_FILE}"
+            else:
+                qr_src = f"data:image/png;base64,{base64.b64encode(qr_bytes).decode()}"
+            st.markdown(REGISTRATION_QR_TEMPLATE.format(qr_src=qr_src), unsafe_allow_html=True)
             
             # Download button
-            qr_bytes = st.session_state.barcode_gen.img_to_bytes(registration_qr)
             st.download_button(
                 label="📥 Download QR Code",
                 data=qr_bytes,
@@ -808,15 +1305,14 @@ elif st.session_state.page == "Register":
     st.subheader("🎟 Scan to Register on Your Phone")
 
     if "barcode_gen" not in st.session_state:
-        st.session_state.barcode_gen = BarcodeGenerator()
+        st.session_state.barcode_gen = _get_barcode_gen()
 
-    if "registration_qr" not in st.session_state:
-        st.session_state.registration_qr = (
-            st.session_state.barcode_gen.create_registration_qr()
-        )
+    registration_qr = _build_registration_qr(
+        f"{st.session_state.barcode_gen.base_url}/?page=Register"
+    )
 
     st.image(
-        st.session_state.registration_qr,
+        registration_qr,
         width=320,
         caption="Scan with your phone camera to open the registration form"
     )
@@ -829,12 +1325,32 @@ elif st.session_state.page == "Register":
     
     if form_valid:
         with st.spinner("Processing registration..."):
-            # Add registration to database
-            success, message, ticket_id, qr_img = st.session_state.db.add_registration(form_data)
+            # A double-clicked submit resends the same form; show the ticket
+            # already issued for it instead of registering the attendee twice.
+            # Only what the user typed is hashed: scanned_data carries a timestamp
+            entered = {k: v for k, v in form_data.items() if k != 'scanned_data'}
+            form_key = hashlib.blake2b(
+                json.dumps(entered, sort_keys=True).encode(), digest_size=16
+            ).digest()
+            last_ticket = st.session_state.get('last_ticket')
+            # The ticket must still be stored: a reset since may have deleted it
+            repeat = (last_ticket is not None and last_ticket[0] == form_key
+                      and st.session_state.db.get_attendee(last_ticket[1]) is not None)
+            
+            if repeat:
+                success, message = True, ""
+                ticket_id, qr_bytes = last_ticket[1], last_ticket[2]
+            else:
+                # Add registration to database
+                success, message, ticket_id, qr_img = st.session_state.db.add_registration(form_data)
+                qr_bytes = st.session_state.barcode_gen.img_to_bytes(qr_img) if qr_img else None
+                if success:
+                    st.session_state.last_ticket = (form_key, ticket_id, qr_bytes)
             
             if success:
                 st.success("✅ Registration Successful!")
-                st.balloons()
+                if not repeat:
+                    _celebrate()
                 
                 # Show registration confirmation
                 st.subheader("🎫 Your Digital Ticket")
@@ -843,16 +1359,14 @@ elif st.session_state.page == "Register":
                 
                 with col1:
                     # Display CHECK-IN QR code
-                    if qr_img:
+                    if qr_bytes:
                         st.markdown('<div class="ticket-display">', unsafe_allow_html=True)
-                        st.image(qr_img)
+                        st.image(qr_bytes)
                         st.markdown(f"**Ticket ID:** `{ticket_id}`")
                         st.markdown("**Present this QR code at event entry**")
                         st.markdown('</div>', unsafe_allow_html=True)
                         
                         # Download buttons
-                        qr_bytes = st.session_state.barcode_gen.img_to_bytes(qr_img)
-                        
                         col_dl1, col_dl2 = st.columns(2)
                         with col_dl1:
                             st.download_button(
@@ -864,20 +1378,12 @@ elif st.session_state.page == "Register":
                             )
                         with col_dl2:
                             # Generate text ticket
-                            ticket_text = f"""
-                            ROOTED WORLD TOUR - WORSHIP NIGHT
-                            
-                            Ticket ID: {ticket_id}
-                            Name: {form_data['first_name']} {form_data['last_name']}
-                            Email: {form_data['email']}
-                            
-                            Instructions:
-                            1. Present this ticket at entry
-                            2. Staff will scan your QR code
-                            3. Keep this ticket for reference
-                            
-                            For questions: info@rootedworldtour.com
-                            """
+                            ticket_text = TICKET_TEXT_TEMPLATE.format(
+                                ticket_id=ticket_id,
+                                first_name=form_data['first_name'],
+                                last_name=form_data['last_name'],
+                                email=form_data['email']
+                            )
                             
                             st.download_button(
                                 label="📄 Text Ticket",
@@ -955,6 +1461,10 @@ elif st.session_state.page == "Register":
 elif st.session_state.page == "Check-in":
     st.title("✅ QR Code Check-in System")
     
+    if BARCODE_SCANNING_AVAILABLE:
+        import cv2
+        import numpy as np
+    
     # Mobile-friendly tabs
     tab_webcam, tab_mobile, tab_manual, tab_camera = st.tabs(["🎥 Webcam Scan", "📱 Mobile Check-in", "⌨️ Manual Entry", "📸 Camera Live"])
     
@@ -971,43 +1481,42 @@ elif st.session_state.page == "Check-in":
             if camera_img:
                 try:
                     # Convert to numpy array
-                    img_bytes = camera_img.getvalue()
-                    nparr = np.frombuffer(img_bytes, np.uint8)
-                    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    # Use OpenCV's QR code detector
-                    qr_detector = cv2.QRCodeDetector()
+                    nparr = np.frombuffer(camera_img.getbuffer(), np.uint8)
+                    img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
                     
                     # Detect and decode
-                    data, vertices_array, binary_qrcode = qr_detector.detectAndDecode(img)
+                    decoded = _decode_qr(img)
                     
-                    if data:
-                        st.success(f"✅ QR Code Detected!")
-                        st.code(data)
+                    if decoded:
+                        st.success(f"✅ QR Code Detected!" if len(decoded) == 1 else f"✅ {len(decoded)} QR Codes Detected!")
                         
-                        # Extract ticket ID
-                        ticket_id = _extract_ticket_id(data)
-                        
-                        if ticket_id:
-                            # Process check-in
-                            with st.spinner("Processing check-in..."):
-                                success, attendee = st.session_state.db.quick_checkin(ticket_id)
-                                if success:
-                                    st.success(f"✅ Check-in successful! Welcome {attendee[0]} {attendee[1]}!")
-                                    st.balloons()
-                                    
-                                    # Add to history
-                                    st.session_state.scan_history.append({
-                                        'ticket_id': ticket_id,
-                                        'name': f"{attendee[0]} {attendee[1]}",
-                                        'time': datetime.now().strftime("%H:%M:%S"),
-                                        'method': 'webcam',
-                                        'status': 'checked_in'
-                                    })
-                                else:
-                                    st.warning(f"⚠️ Ticket {ticket_id} already checked in or not found")
-                        else:
-                            st.warning("Could not extract ticket ID from QR code")
+                        # Every code in the frame is checked in, so a sheet of tickets takes one snap
+                        for data in decoded:
+                            st.code(data)
+                            
+                            # Extract ticket ID
+                            ticket_id = _extract_ticket_id(data)
+                            
+                            if ticket_id:
+                                # Process check-in
+                                with st.spinner("Processing check-in..."):
+                                    success, attendee = st.session_state.db.quick_checkin(ticket_id)
+                                    if success:
+                                        st.success(f"✅ Check-in successful! Welcome {attendee[0]} {attendee[1]}!")
+                                        _celebrate()
+                                        
+                                        # Add to history
+                                        st.session_state.scan_history.append({
+                                            'ticket_id': ticket_id,
+                                            'name': f"{attendee[0]} {attendee[1]}",
+                                            'time': time.strftime("%H:%M:%S"),
+                                            'method': 'webcam',
+                                            'status': 'checked_in'
+                                        })
+                                    else:
+                                        st.warning(f"⚠️ Ticket {ticket_id} already checked in or not found")
+                            else:
+                                st.warning("Could not extract ticket ID from QR code")
                     else:
                         st.warning("No QR code detected. Try again.")
                         
@@ -1064,16 +1573,60 @@ elif st.session_state.page == "Check-in":
             st.markdown('<div class="scan-line"></div>', unsafe_allow_html=True)
             
             if camera_img:
+                # Decode the captured frame with the shared OpenCV detector
+                if BARCODE_SCANNING_AVAILABLE:
+                    frame_bytes = camera_img.getbuffer()
+                    frame_hash = hashlib.blake2b(frame_bytes, digest_size=8).digest()
+                    last_scan = st.session_state.get('live_scan')
+                    
+                    if last_scan and last_scan[0] == frame_hash:
+                        # Same capture as the previous run (another widget changed):
+                        # replay its outcome instead of decoding and checking in again
+                        _, ticket_id, success, attendee = last_scan
+                        is_new_scan = False
+                    else:
+                        nparr = np.frombuffer(frame_bytes, np.uint8)
+                        frame = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+                        decoded = _decode_qr(frame)
+                        # A badge may carry several codes; take the first that is a ticket
+                        ticket_id = next((tid for tid in map(_extract_ticket_id, decoded) if tid), None)
+                        success, attendee = False, None
+                        if ticket_id:
+                            # Process check-in
+                            with st.spinner("Processing check-in..."):
+                                success, attendee = st.session_state.db.quick_checkin(ticket_id)
+                        st.session_state.live_scan = (frame_hash, ticket_id, success, attendee)
+                        is_new_scan = True
+                    
+                    if ticket_id:
+                        st.success(f"✅ QR Code Detected: {ticket_id}")
+                        
+                        if success:
+                            st.success(f"✅ Check-in successful! Welcome {attendee[0]} {attendee[1]}!")
+                            
+                            if is_new_scan:
+                                _celebrate()
+                                
+                                # Add to history
+                                st.session_state.scan_history.append({
+                                    'ticket_id': ticket_id,
+                                    'name': f"{attendee[0]} {attendee[1]}",
+                                    'time': time.strftime("%H:%M:%S"),
+                                    'method': 'camera',
+                                    'status': 'checked_in'
+                                })
+                        else:
+                            st.warning(f"⚠️ Ticket {ticket_id} already checked in or not found")
+                    else:
+                        st.warning("No QR code detected. Try again.")
+                
                 # Try to decode with API if pyzbar not available
-                if not BARCODE_SCANNING_AVAILABLE:
+                else:
                     st.info("⚠️ Using simulated QR detection. Install pyzbar for real scanning.")
                     
                     # Simulate QR code detection
                     if st.button("🔍 Simulate QR Detection", type="primary"):
-                        # Create test ticket IDs
-                        test_tickets = ["RWT-ABC123", "RWT-DEF456", "VIP-GHI789", "WT-JKL012", "VOL-MNO345"]
-                        import random
-                        ticket_id = random.choice(test_tickets)
+                        ticket_id = random.choice(SIMULATED_TICKETS)
                         
                         st.success(f"✅ Simulated QR Code Detected: {ticket_id}")
                         
@@ -1082,13 +1635,13 @@ elif st.session_state.page == "Check-in":
                             success, attendee = st.session_state.db.quick_checkin(ticket_id)
                             if success:
                                 st.success(f"✅ Check-in successful! Welcome {attendee[0]} {attendee[1]}!")
-                                st.balloons()
+                                _celebrate()
                                 
                                 # Add to history
                                 st.session_state.scan_history.append({
                                     'ticket_id': ticket_id,
                                     'name': f"{attendee[0]} {attendee[1]}",
-                                    'time': datetime.now().strftime("%H:%M:%S"),
+                                    'time': time.strftime("%H:%M:%S"),
                                     'method': 'camera',
                                     'status': 'checked_in'
                                 })
@@ -1106,7 +1659,9 @@ elif st.session_state.page == "Check-in":
                 )
                 
                 if uploaded_file:
-                    st.image(uploaded_file, caption="Uploaded Image", width=300)
+                    # Preview as JPEG; PNG uploads would otherwise be re-sent losslessly
+                    st.image(uploaded_file, caption="Uploaded Image", width=300,
+                             output_format="JPEG")
                     
                     # Manual ticket entry from image
                     manual_ticket = st.text_input(
@@ -1121,13 +1676,13 @@ elif st.session_state.page == "Check-in":
                                 success, attendee = st.session_state.db.quick_checkin(manual_ticket)
                                 if success:
                                     st.success(f"✅ Welcome {attendee[0]} {attendee[1]}!")
-                                    st.balloons()
+                                    _celebrate()
                                     
                                     # Add to history
                                     st.session_state.scan_history.append({
                                         'ticket_id': manual_ticket,
                                         'name': f"{attendee[0]} {attendee[1]}",
-                                        'time': datetime.now().strftime("%H:%M:%S"),
+                                        'time': time.strftime("%H:%M:%S"),
                                         'method': 'camera_manual',
                                         'status': 'checked_in'
                                     })
@@ -1184,12 +1739,12 @@ elif st.session_state.page == "Check-in":
         if uploaded_file and BARCODE_SCANNING_AVAILABLE:
             try:
                 # Open and decode image
-                img = Image.open(uploaded_file)
-                decoded_objects = decode(img)
+                nparr = np.frombuffer(uploaded_file.getbuffer(), np.uint8)
+                img = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+                decoded_objects = _decode_qr(img)
                 
                 if decoded_objects:
-                    for obj in decoded_objects:
-                        qr_data = obj.data.decode('utf-8')
+                    for qr_data in decoded_objects:
                         st.info(f"**QR Code Content:** {qr_data}")
                         
                         # Extract ticket ID
@@ -1201,13 +1756,13 @@ elif st.session_state.page == "Check-in":
                                     success, attendee = st.session_state.db.quick_checkin(ticket_id)
                                     if success:
                                         st.success(f"✅ Welcome {attendee[0]} {attendee[1]}!")
-                                        st.balloons()
+                                        _celebrate()
                                         
                                         # Add to history
                                         st.session_state.scan_history.append({
                                             'ticket_id': ticket_id,
                                             'name': f"{attendee[0]} {attendee[1]}",
-                                            'time': datetime.now().strftime("%H:%M:%S"),
+                                            'time': time.strftime("%H:%M:%S"),
                                             'method': 'upload',
                                             'status': 'checked_in'
                                         })
@@ -1247,7 +1802,7 @@ elif st.session_state.page == "Check-in":
             col1, col2 = st.columns(2)
             with col1:
                 # Generate example QR
-                example_qr = st.session_state.barcode_gen.create_checkin_qr("RWT-EXAMPLE")
+                example_qr = _build_example_checkin_qr()
                 if example_qr:
                     st.image(example_qr, caption="Example QR code")
                 else:
@@ -1271,23 +1826,20 @@ elif st.session_state.page == "Check-in":
         st.subheader("Manual Ticket Entry")
         st.info("Enter ticket ID manually (fallback method)")
         
-        manual_ticket = st.text_input(
-            "Enter Ticket ID:",
-            placeholder="RWT-ABC123DEF",
-            key="manual_ticket"
-        )
+        # Inside a form, typing doesn't rerun the script; the value only
+        # updates (and stays) once the form is submitted
+        with st.form("manual_entry"):
+            manual_ticket = st.text_input(
+                "Enter Ticket ID:",
+                placeholder="RWT-ABC123DEF",
+                key="manual_ticket"
+            )
+            st.form_submit_button("🔍 Look up", use_container_width=True)
         
         if manual_ticket:
             # Search for ticket
-            conn = st.session_state.db.get_connection()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT first_name, last_name, status FROM registrations WHERE ticket_id = ?",
-                    (manual_ticket,)
-                )
-                result = cursor.fetchone()
-                conn.close()
+            if hasattr(st.session_state.db, 'get_attendee'):
+                result = _lookup_ticket(st.session_state.db, st.session_state.db.data_version, manual_ticket)
                 
                 if result:
                     first_name, last_name, status = result
@@ -1302,13 +1854,13 @@ elif st.session_state.page == "Check-in":
                                 success, attendee = st.session_state.db.quick_checkin(manual_ticket)
                                 if success:
                                     st.success(f"✅ Welcome {attendee[0]} {attendee[1]}!")
-                                    st.balloons()
+                                    _celebrate()
                                     
                                     # Add to history
                                     st.session_state.scan_history.append({
                                         'ticket_id': manual_ticket,
                                         'name': f"{attendee[0]} {attendee[1]}",
-                                        'time': datetime.now().strftime("%H:%M:%S"),
+                                        'time': time.strftime("%H:%M:%S"),
                                         'method': 'manual',
                                         'status': 'checked_in'
                                     })
@@ -1318,13 +1870,13 @@ elif st.session_state.page == "Check-in":
                 # Simulate database for demo
                 if st.button(f"Simulate Check-in for {manual_ticket}", type="primary", use_container_width=True):
                     st.success(f"✅ Simulated check-in for {manual_ticket}")
-                    st.balloons()
+                    _celebrate()
                     
                     # Add to history
                     st.session_state.scan_history.append({
                         'ticket_id': manual_ticket,
                         'name': "Simulated Attendee",
-                        'time': datetime.now().strftime("%H:%M:%S"),
+                        'time': time.strftime("%H:%M:%S"),
                         'method': 'manual',
                         'status': 'checked_in'
                     })
@@ -1333,7 +1885,7 @@ elif st.session_state.page == "Check-in":
     with st.sidebar:
         st.subheader("📊 Live Check-in Stats")
         
-        stats = st.session_state.db.get_dashboard_stats()
+        stats = get_cached_dashboard_stats(st.session_state.db)
         
         col_stat1, col_stat2 = st.columns(2)
         with col_stat1:
@@ -1349,15 +1901,8 @@ elif st.session_state.page == "Check-in":
         # Recent scans
         if st.session_state.scan_history:
             st.subheader("📋 Recent Scans")
-            for scan in list(reversed(st.session_state.scan_history))[:5]:
-                method_icon = {
-                    'webcam': '📷',
-                    'upload': '📁',
-                    'manual': '⌨️',
-                    'camera': '📸',
-                    'camera_manual': '📸✍️',
-                    'auto_qr': '🔗'
-                }.get(scan.get('method', ''), '⚪')
+            for scan in islice(reversed(st.session_state.scan_history), 5):
+                method_icon = SCAN_METHOD_ICONS.get(scan.get('method', ''), '⚪')
                 
                 st.caption(
                     f"{method_icon} {scan.get('ticket_id', 'N/A')} - "
@@ -1375,7 +1920,7 @@ elif st.session_state.page == "Check-in":
             st.rerun()
         
         if st.button("🧹 Clear Scan History", use_container_width=True):
-            st.session_state.scan_history = []
+            st.session_state.scan_history.clear()
             st.success("Scan history cleared!")
             st.rerun()
 
@@ -1383,12 +1928,11 @@ elif st.session_state.page == "Check-in":
 elif st.session_state.page == "Dashboard":
     st.title("📊 Event Dashboard")
     
+    import pandas as pd
+    
     # Get data for dashboard
-    conn = st.session_state.db.get_connection()
-    if conn:
-        df = pd.read_sql_query("SELECT * FROM registrations", conn)
-        conn.close()
-    else:
+    df = _load_registrations(st.session_state.db, st.session_state.db.data_version)
+    if df is None:
         # Create sample data for demo
         df = pd.DataFrame({
             'ticket_id': ['RWT-ABC123', 'RWT-DEF456', 'VIP-GHI789', 'WT-JKL012'],
@@ -1400,8 +1944,10 @@ elif st.session_state.page == "Dashboard":
             'worship_team': [0, 0, 0, 1],
             'volunteer': [0, 1, 0, 0]
         })
+        df['hour'] = df['registration_time'].dt.hour
     
-    stats = st.session_state.db.get_dashboard_stats()
+    # One pass over the status column feeds the metrics
+    status_counts = df['status'].value_counts() if not df.empty else None
     
     # Top metrics row
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -1409,7 +1955,7 @@ elif st.session_state.page == "Dashboard":
     with col1:
         st.metric("Total Registered", len(df) if not df.empty else 0)
     with col2:
-        checked_in = len(df[df['status'] == 'checked_in']) if not df.empty else 0
+        checked_in = int(status_counts.get('checked_in', 0)) if not df.empty else 0
         st.metric("Checked In", checked_in)
     with col3:
         checkin_rate = (checked_in / len(df) * 100) if not df.empty and len(df) > 0 else 0
@@ -1425,75 +1971,29 @@ elif st.session_state.page == "Dashboard":
     
     # Create and display charts
     if not df.empty:
-        charts = create_dashboard_charts(stats, df)
-        
         # Display charts in tabs
         tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "⏰ Time Analysis", "👥 Demographics", "📋 Raw Data"])
         
         with tab1:
-            col1, col2 = st.columns(2)
-            with col1:
-                # Check-in gauge
-                fig_gauge = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = checkin_rate,
-                    title = {'text': "Check-in Rate"},
-                    gauge = {
-                        'axis': {'range': [0, 100]},
-                        'bar': {'color': "#4CAF50"},
-                        'steps': [
-                            {'range': [0, 50], 'color': "lightgray"},
-                            {'range': [50, 75], 'color': "gray"}
-                        ]
-                    }
-                ))
-                st.plotly_chart(fig_gauge, use_container_width=True)
-            with col2:
-                # Status pie chart
-                status_counts = df['status'].value_counts()
-                fig_pie = px.pie(
-                    values=status_counts.values,
-                    names=status_counts.index,
-                    title="Registration Status",
-                    color_discrete_sequence=['#4CAF50', '#FF9800']
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
+            # Gauge, status and source pies, today's check-ins and the timeline
+            render_dashboard(get_cached_dashboard_stats(st.session_state.db), df)
         
         with tab2:
             col1, col2 = st.columns(2)
             with col1:
                 # Hourly registrations
-                df['hour'] = pd.to_datetime(df['registration_time']).dt.hour
                 hour_counts = df['hour'].value_counts().sort_index()
-                fig_hours = px.bar(
-                    x=hour_counts.index,
-                    y=hour_counts.values,
-                    title="Registrations by Hour",
-                    labels={'x': 'Hour of Day', 'y': 'Registrations'},
-                    color_discrete_sequence=['#4CAF50']
+                st.plotly_chart(
+                    _hourly_bar_figure(tuple(hour_counts.items())),
+                    use_container_width=True
                 )
-                st.plotly_chart(fig_hours, use_container_width=True)
         
         with tab3:
             # Team distribution
-            team_data = {
-                'Team': ['Attendees', 'Worship Team', 'Volunteers'],
-                'Count': [
-                    len(df) - worship_team - volunteers,
-                    worship_team,
-                    volunteers
-                ]
-            }
-            team_df = pd.DataFrame(team_data)
-            fig_teams = px.bar(
-                team_df,
-                x='Team',
-                y='Count',
-                title="Team Distribution",
-                color='Team',
-                color_discrete_sequence=['#4CAF50', '#2196F3', '#FF9800']
+            st.plotly_chart(
+                _team_bar_figure(int(len(df) - worship_team - volunteers), int(worship_team), int(volunteers)),
+                use_container_width=True
             )
-            st.plotly_chart(fig_teams, use_container_width=True)
         
         with tab4:
             # Raw data with filtering
@@ -1503,10 +2003,11 @@ elif st.session_state.page == "Dashboard":
             col_filter1, col_filter2 = st.columns(2)
             with col_filter1:
                 if 'status' in df.columns:
+                    statuses = df['status'].unique().tolist()
                     status_filter = st.multiselect(
                         "Filter by Status:",
-                        options=df['status'].unique(),
-                        default=df['status'].unique()
+                        options=statuses,
+                        default=statuses
                     )
                 else:
                     status_filter = []
@@ -1519,9 +2020,12 @@ elif st.session_state.page == "Dashboard":
             if status_filter and 'status' in df.columns:
                 filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
             if search_term:
-                filtered_df = filtered_df[
-                    filtered_df.apply(lambda row: search_term.lower() in str(row).lower(), axis=1)
-                ]
+                # One vectorized substring match instead of stringifying every row
+                text = filtered_df.reindex(columns=['ticket_id', 'first_name', 'last_name', 'email']).fillna('').astype(str)
+                haystack = text['ticket_id'].str.cat(
+                    [text['first_name'], text['last_name'], text['email']], sep=' '
+                ).str.lower()
+                filtered_df = filtered_df[haystack.str.contains(search_term.lower(), regex=False)]
             
             st.dataframe(
                 filtered_df,
@@ -1531,10 +2035,14 @@ elif st.session_state.page == "Dashboard":
             
             # Export filtered data
             if not filtered_df.empty:
-                csv = filtered_df.to_csv(index=False)
+                fingerprint = (len(filtered_df), int(pd.util.hash_pandas_object(filtered_df).sum()))
+                csv_bytes = _filtered_csv(
+                    filtered_df, st.session_state.db.data_version, fingerprint,
+                    status_filter, search_term
+                )
                 st.download_button(
                     label="📥 Download Filtered Data (CSV)",
-                    data=csv,
+                    data=csv_bytes,
                     file_name="filtered_registrations.csv",
                     mime="text/csv",
                     use_container_width=True
@@ -1547,6 +2055,8 @@ elif st.session_state.page == "Dashboard":
 elif st.session_state.page == "Manage":
     st.title("⚙️ Event Management")
     
+    import pandas as pd
+    
     tab1, tab2, tab3, tab4 = st.tabs(["🎫 Generate QR Tickets", "📦 Bulk Operations", "⚙️ System Settings", "☁️ Google Drive Sync"])
     
     with tab1:
@@ -1577,11 +2087,21 @@ elif st.session_state.page == "Manage":
             
             if st.button("Generate Tickets", type="primary", use_container_width=True):
                 with st.spinner(f"Generating {num_tickets} tickets..."):
+                    barcode_gen = st.session_state.barcode_gen
+                    ticket_ids = [barcode_gen.generate_ticket_id(ticket_prefix) for _ in range(num_tickets)]
+                    
+                    def render_png(ticket_id):
+                        # Encode straight away so only the PNG bytes are kept;
+                        # previews and the ZIP reuse them
+                        return barcode_gen.img_to_bytes(barcode_gen.create_checkin_qr(ticket_id))
+                    
+                    # PNG compression and PIL drawing release the GIL, so
+                    # rendering the codes on a few threads overlaps that work
+                    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+                        qr_bytes = list(executor.map(render_png, ticket_ids))
+                    
                     tickets = []
-                    for i in range(num_tickets):
-                        ticket_id = st.session_state.barcode_gen.generate_ticket_id(ticket_prefix)
-                        qr_img = st.session_state.barcode_gen.create_checkin_qr(ticket_id)
-                        
+                    for i, (ticket_id, img_bytes) in enumerate(zip(ticket_ids, qr_bytes)):
                         # Create a simple registration for each ticket
                         ticket_data = {
                             'ticket_id': ticket_id,
@@ -1592,18 +2112,29 @@ elif st.session_state.page == "Manage":
                             'scanned_data': ticket_id
                         }
                         
-                        # Add to database
-                        st.session_state.db.add_registration(ticket_data)
-                        
                         tickets.append({
                             'ticket_id': ticket_id,
-                            'qr_image': qr_img,
+                            'qr_bytes': img_bytes,
                             'type': ticket_type,
                             'data': ticket_data
                         })
                     
-                    st.session_state.generated_tickets = tickets
-                    st.success(f"Generated {num_tickets} {ticket_type} tickets!")
+                    # Add to database in one transaction
+                    if hasattr(st.session_state.db, 'add_registrations_bulk'):
+                        success, message = st.session_state.db.add_registrations_bulk(
+                            [ticket['data'] for ticket in tickets]
+                        )
+                    else:
+                        for ticket in tickets:
+                            st.session_state.db.add_registration(ticket['data'])
+                        success, message = True, ""
+                    
+                    if success:
+                        st.session_state.generated_tickets = tickets
+                        st.session_state.pop('tickets_zip', None)
+                        st.success(f"Generated {num_tickets} {ticket_type} tickets!")
+                    else:
+                        st.error(message)
         
         with col2:
             if 'generated_tickets' in st.session_state:
@@ -1614,16 +2145,15 @@ elif st.session_state.page == "Manage":
                 for i in range(preview_count):
                     ticket = st.session_state.generated_tickets[i]
                     with st.expander(f"Ticket {i+1}: {ticket['ticket_id']}"):
-                        if ticket['qr_image']:
-                            st.image(ticket['qr_image'])
+                        if ticket['qr_bytes']:
+                            st.image(ticket['qr_bytes'])
                         st.code(f"ID: {ticket['ticket_id']}\nType: {ticket['type']}")
                         
                         # Download individual ticket
-                        if ticket['qr_image']:
-                            img_buffer = st.session_state.barcode_gen.img_to_bytes(ticket['qr_image'])
+                        if ticket['qr_bytes']:
                             st.download_button(
                                 label=f"Download {ticket['ticket_id']}",
-                                data=img_buffer,
+                                data=ticket['qr_bytes'],
                                 file_name=f"ticket_{ticket['ticket_id']}.png",
                                 mime="image/png",
                                 use_container_width=True
@@ -1634,8 +2164,21 @@ elif st.session_state.page == "Manage":
                 
                 # Bulk download option
                 st.markdown("---")
-                if st.button("📦 Download All as ZIP (Simulated)", use_container_width=True):
-                    st.info("In a full implementation, this would create a ZIP file with all QR codes")
+                if 'tickets_zip' not in st.session_state:
+                    if st.button("📦 Prepare ZIP of All Tickets", use_container_width=True):
+                        with st.spinner("Packaging QR codes..."):
+                            st.session_state.tickets_zip = _build_tickets_zip(
+                                st.session_state.generated_tickets
+                            )
+                        st.rerun()
+                else:
+                    st.download_button(
+                        label="📦 Download All as ZIP",
+                        data=st.session_state.tickets_zip,
+                        file_name=f"tickets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                        mime="application/zip",
+                        use_container_width=True
+                    )
                 
                 # Print instructions
                 st.markdown("---")
@@ -1680,38 +2223,45 @@ elif st.session_state.page == "Manage":
                 if uploaded_file.name.endswith('.csv'):
                     df_import = pd.read_csv(uploaded_file)
                 else:
-                    df_import = pd.read_excel(uploaded_file)
+                    df_import = _read_excel_upload(uploaded_file)
                 
                 st.dataframe(df_import.head())
                 
                 if st.button("Import to Database", type="primary"):
-                    import_count = 0
-                    for _, row in df_import.iterrows():
-                        ticket_data = {
-                            'first_name': row.get('first_name', ''),
-                            'last_name': row.get('last_name', ''),
-                            'email': row.get('email', ''),
-                            'phone': str(row.get('phone', '')),
+                    # Normalise the columns once instead of reading each row as a Series
+                    df_rows = df_import.reindex(columns=['first_name', 'last_name', 'email', 'phone']).fillna('')
+                    df_rows['phone'] = df_rows['phone'].astype(str)
+                    records = [
+                        {
+                            'ticket_id': st.session_state.barcode_gen.generate_ticket_id(),
+                            'first_name': first_name,
+                            'last_name': last_name,
+                            'email': email,
+                            'phone': phone,
                             'scanned_data': ''
                         }
-                        success, _, _, _ = st.session_state.db.add_registration(ticket_data)
-                        if success:
-                            import_count += 1
+                        for first_name, last_name, email, phone in df_rows.itertuples(index=False, name=None)
+                    ]
+                    
+                    if hasattr(st.session_state.db, 'add_registrations_bulk'):
+                        success, message = st.session_state.db.add_registrations_bulk(records)
+                        import_count = len(records) if success else 0
+                    else:
+                        import_count = sum(
+                            st.session_state.db.add_registration(record)[0] for record in records
+                        )
+                        success, message = True, ""
                     
-                    st.success(f"Imported {import_count} records!")
+                    if success:
+                        st.success(f"Imported {import_count} records!")
+                    else:
+                        st.error(message)
         
         elif operation == "Bulk Check-in":
             st.warning("This will check-in all registered attendees.")
             if st.button("Check-in All Registered", type="secondary"):
-                conn = st.session_state.db.get_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "UPDATE registrations SET status = 'checked_in', checkin_time = CURRENT_TIMESTAMP WHERE status = 'registered'"
-                    )
-                    updated = cursor.rowcount
-                    conn.commit()
-                    conn.close()
+                if hasattr(st.session_state.db, 'checkin_all_registered'):
+                    updated = st.session_state.db.checkin_all_registered()
                     st.success(f"Checked in {updated} attendees!")
                 else:
                     st.error("Database not connected")
@@ -1725,26 +2275,22 @@ elif st.session_state.page == "Manage":
             st.markdown("**Database Management**")
             
             if st.button("Backup Database", use_container_width=True):
-                # Create backup
-                with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_file:
-                    backup_path = tmp_file.name
-                    if hasattr(st.session_state.db, 'export_to_csv'):
-                        success = st.session_state.db.export_to_csv(backup_path)
-                        if success:
-                            with open(backup_path, 'rb') as f:
-                                data = f.read()
-                                st.download_button(
-                                    label="📥 Download Backup",
-                                    data=data,
-                                    file_name=f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                    mime="text/csv",
-                                    use_container_width=True
-                                )
-                            st.success("Database backup created!")
-                        else:
-                            st.error("Backup failed")
+                # Create backup in memory; no temp file round trip
+                if hasattr(st.session_state.db, 'export_to_csv_bytes'):
+                    data = st.session_state.db.export_to_csv_bytes()
+                    if data:
+                        st.download_button(
+                            label="📥 Download Backup",
+                            data=data,
+                            file_name=f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv",
+                            use_container_width=True
+                        )
+                        st.success("Database backup created!")
                     else:
-                        st.info("Database backup simulation")
+                        st.error("Backup failed")
+                else:
+                    st.info("Database backup simulation")
             
             st.markdown("---")
             st.markdown("### 🚨 System Reset")
@@ -1799,13 +2345,15 @@ elif st.session_state.page == "Manage":
                                     conn.close()
                                     
                                     # Clear session state
-                                    st.session_state.scan_history = []
+                                    st.session_state.scan_history.clear()
                                     if 'generated_tickets' in st.session_state:
                                         del st.session_state.generated_tickets
+                                    if 'last_ticket' in st.session_state:
+                                        del st.session_state.last_ticket
                                     st.session_state.last_scanned = None
                                     
                                     st.success(f"✅ Data cleared! Deleted {count_before} registrations.")
-                                    st.balloons()
+                                    _celebrate()
                                     
                                     # Refresh to show updated stats
                                     st.rerun()
@@ -1817,32 +2365,43 @@ elif st.session_state.page == "Manage":
                                 try:
                                     db_path = "event_registration.db"
                                     
-                                    # Create backup if requested
-                                    if create_backup and os.path.exists(db_path):
-                                        import shutil
+                                    # Close the shared connection first; the last close
+                                    # checkpoints the WAL, so the backup is a single file
+                                    if hasattr(st.session_state.db, 'close'):
+                                        st.session_state.db.close()
+                                    
+                                    # Create backup if requested (copy2 uses sendfile on Linux)
+                                    if create_backup:
                                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                                         backup_dir = "backups"
                                         os.makedirs(backup_dir, exist_ok=True)
                                         backup_file = f"{backup_dir}/event_registration_backup_{timestamp}.db"
-                                        shutil.copy2(db_path, backup_file)
-                                        st.info(f"✅ Backup created: {backup_file}")
-                                    
-                                    # Close any existing connection
-                                    conn = st.session_state.db.get_connection()
-                                    if conn:
-                                        conn.close()
+                                        try:
+                                            shutil.copy2(db_path, backup_file)
+                                            st.info(f"✅ Backup created: {backup_file}")
+                                        except FileNotFoundError:
+                                            pass
                                     
                                     # Delete the database file
-                                    if os.path.exists(db_path):
+                                    try:
                                         os.remove(db_path)
                                         st.info("🗑️ Database file deleted")
+                                    except FileNotFoundError:
+                                        pass
+                                    
+                                    # Drop WAL side files so they aren't replayed into the new database
+                                    for suffix in ("-wal", "-shm"):
+                                        try:
+                                            os.remove(db_path + suffix)
+                                        except FileNotFoundError:
+                                            pass
                                     
-                                    # Reinitialize the database
-                                    from database import EventDatabase
-                                    st.session_state.db = EventDatabase()
+                                    # Reinitialize the shared database
+                                    _get_db.clear()
+                                    st.session_state.db = _get_db()
                                     
                                     # Clear all session state
-                                    for key in ['scan_history', 'generated_tickets', 'last_scanned']:
+                                    for key in ['scan_history', 'generated_tickets', 'last_scanned', 'last_ticket']:
                                         if key in st.session_state:
                                             del st.session_state[key]
                                     
@@ -1850,7 +2409,7 @@ elif st.session_state.page == "Manage":
                                     st.session_state.page = "Home"
                                     
                                     st.success("✅ Complete system reset! Database recreated from scratch.")
-                                    st.balloons()
+                                    _celebrate()
                                     
                                     # Refresh to show clean state
                                     st.rerun()
@@ -1866,29 +2425,16 @@ elif st.session_state.page == "Manage":
                 st.markdown("---")
                 st.markdown("**Current Database Info**")
                 
-                conn = st.session_state.db.get_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    
-                    # Get counts
-                    cursor.execute("SELECT COUNT(*) FROM registrations")
-                    total_reg = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM registrations WHERE status='checked_in'")
-                    checked_in = cursor.fetchone()[0]
-                    
-                    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-                    table_count = cursor.fetchone()[0]
-                    
-                    conn.close()
+                if hasattr(st.session_state.db, 'get_database_info'):
+                    db_info = _database_info(st.session_state.db, st.session_state.db.data_version)
                     
                     col_info1, col_info2, col_info3 = st.columns(3)
                     with col_info1:
-                        st.metric("Total Records", total_reg)
+                        st.metric("Total Records", db_info['total'])
                     with col_info2:
-                        st.metric("Tables", table_count)
+                        st.metric("Tables", db_info['tables'])
                     with col_info3:
-                        st.metric("Database Size", f"{os.path.getsize('event_registration.db') / 1024:.1f} KB" if os.path.exists('event_registration.db') else "N/A")
+                        st.metric("Database Size", f"{db_info['size_bytes'] / 1024:.1f} KB" if db_info['size_bytes'] is not None else "N/A")
                 else:
                     st.info("Database information not available")
         
@@ -1939,8 +2485,9 @@ elif st.session_state.page == "Manage":
         
         with col_auth2:
             if st.button("🚪 Disconnect", type="secondary", use_container_width=True):
-                if os.path.exists('token.pickle'):
-                    os.remove('token.pickle')
+                token_file = st.session_state.drive_manager.token_file
+                if os.path.exists(token_file):
+                    os.remove(token_file)
                 st.session_state.google_auth_status = "Not connected"
                 st.session_state.google_auth_message = "Disconnected successfully"
                 st.success("Disconnected from Google Drive")
@@ -2001,24 +2548,22 @@ elif st.session_state.page == "Manage":
                     st.error("Please connect to Google Drive first")
                 else:
                     with st.spinner("Creating backup..."):
-                        # Create temporary backup file
-                        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_file:
-                            backup_path = tmp_file.name
-                            if hasattr(st.session_state.db, 'export_to_csv'):
-                                success = st.session_state.db.export_to_csv(backup_path)
+                        # Export straight to memory and upload without a temp file
+                        if hasattr(st.session_state.db, 'export_to_csv_bytes'):
+                            data = st.session_state.db.export_to_csv_bytes()
+                            if data:
+                                # Upload to Google Drive
+                                success, message = st.session_state.drive_manager.upload_bytes(
+                                    data, backup_name
+                                )
                                 if success:
-                                    # Upload to Google Drive
-                                    success, message = st.session_state.drive_manager.upload_file(
-                                        backup_path, backup_name
-                                    )
-                                    if success:
-                                        st.success(f"✅ Backup uploaded: {message}")
-                                    else:
-                                        st.error(f"❌ Upload failed: {message}")
+                                    st.success(f"✅ Backup uploaded: {message}")
                                 else:
-                                    st.error("Backup creation failed")
+                                    st.error(f"❌ Upload failed: {message}")
                             else:
-                                st.info("Backup simulation complete")
+                                st.error("Backup creation failed")
+                        else:
+                            st.info("Backup simulation complete")
         
         with col_backup2:
             if st.button("🔄 Auto Backup", use_container_width=True):
@@ -2058,7 +2603,7 @@ elif st.session_state.page == "Manage":
                                             import_success = st.session_state.db.import_from_csv(restore_path)
                                             if import_success:
                                                 st.success(f"✅ Restored from {file['name']}")
-                                                st.balloons()
+                                                _celebrate()
                                             else:
                                                 st.error("Import failed")
                                         else:
@@ -2104,6 +2649,8 @@ elif st.session_state.page == "Manage":
 elif st.session_state.page == "Export":
     st.title("📤 Export Data")
     
+    import pandas as pd
+    
     # Export configuration
     col1, col2 = st.columns(2)
     
@@ -2127,28 +2674,43 @@ elif st.session_state.page == "Export":
     conn = st.session_state.db.get_connection()
     
     if conn:
-        # Build query based on filters
-        query = "SELECT * FROM registrations WHERE date(registration_time) BETWEEN ? AND ?"
-        params = [start_date, end_date]
-        
-        if export_type == "Checked-in Only":
-            query += " AND status = 'checked_in'"
-        elif export_type == "Pending Check-in":
-            query += " AND status = 'registered'"
-        elif export_type == "Worship Team":
-            query += " AND worship_team = 1"
-        elif export_type == "Volunteers":
-            query += " AND volunteer = 1"
-        
-        query += " ORDER BY registration_time DESC"
-        
-        df = pd.read_sql_query(query, conn, params=params)
+        # One fixed statement for every filter, so the prepared statement is
+        # reused; unused filters are bound as NULL. A plain range on the
+        # column (not date(...)) lets SQLite use its index
+        query = (
+            "SELECT * FROM registrations "
+            "WHERE registration_time >= ?1 AND registration_time < ?2 "
+            "AND (?3 IS NULL OR status = ?3) "
+            "AND (?4 IS NULL OR worship_team = ?4) "
+            "AND (?5 IS NULL OR volunteer = ?5) "
+            "ORDER BY registration_time DESC"
+        )
+        params = [
+            start_date.isoformat(),
+            (end_date + timedelta(days=1)).isoformat(),
+            EXPORT_STATUS_FILTERS.get(export_type),
+            1 if export_type == "Worship Team" else None,
+            1 if export_type == "Volunteers" else None,
+        ]
+        
+        # Counts come from SQL; only Excel and JSON need the whole table in
+        # pandas, CSV streams from the cursor and the preview needs 5 rows
+        total_count, checked_in, pending = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(status = 'checked_in'), 0), "
+            f"COALESCE(SUM(status = 'registered'), 0) FROM ({query})",
+            params
+        ).fetchone()
+        if export_format in ("Excel", "JSON"):
+            df = pd.read_sql_query(query, conn, params=params)
+        else:
+            df = pd.read_sql_query(query + " LIMIT 5", conn, params=params)
         conn.close()
     else:
         df = pd.DataFrame()
+        total_count = checked_in = pending = 0
     
-    if not df.empty:
-        st.subheader(f"Preview ({len(df)} records)")
+    if total_count:
+        st.subheader(f"Preview ({total_count} records)")
         st.dataframe(df.head(), use_container_width=True)
         
         # Export buttons
@@ -2159,10 +2721,14 @@ elif st.session_state.page == "Export":
         
         with col_exp1:
             if export_format == "CSV":
-                csv = df.to_csv(index=False)
+                # Write rows straight from the cursor instead of via the DataFrame
+                csv_buffer = io.StringIO()
+                csv.writer(csv_buffer).writerows(
+                    st.session_state.db.iter_registrations(query, params)
+                )
                 st.download_button(
                     label="📥 Download CSV",
-                    data=csv,
+                    data=csv_buffer.getvalue(),
                     file_name=f"registrations_{start_date}_to_{end_date}.csv",
                     mime="text/csv",
                     use_container_width=True
@@ -2171,16 +2737,25 @@ elif st.session_state.page == "Export":
         with col_exp2:
             if export_format == "Excel":
                 output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                if XLSXWRITER_AVAILABLE:
+                    # Plain text cells; don't scan every string for URLs or formulas
+                    writer_args = {'engine': 'xlsxwriter', 'engine_kwargs': {'options': {
+                        'strings_to_urls': False, 'strings_to_formulas': False
+                    }}}
+                else:
+                    writer_args = {'engine': 'openpyxl'}
+                with pd.ExcelWriter(output, **writer_args) as writer:
                     df.to_excel(writer, index=False, sheet_name='Registrations')
                     # Add summary sheet
+                    status_counts = df['status'].value_counts()
+                    checked_in_count = int(status_counts.get('checked_in', 0))
                     summary_data = {
                         'Metric': ['Total Registrations', 'Checked In', 'Pending', 'Check-in Rate'],
                         'Value': [
                             len(df),
-                            len(df[df['status'] == 'checked_in']),
-                            len(df[df['status'] == 'registered']),
-                            f"{(len(df[df['status'] == 'checked_in']) / len(df) * 100):.1f}%" if len(df) > 0 else "0%"
+                            checked_in_count,
+                            int(status_counts.get('registered', 0)),
+                            f"{(checked_in_count / len(df) * 100):.1f}%" if len(df) > 0 else "0%"
                         ]
                     }
                     pd.DataFrame(summary_data).to_excel(writer, index=False, sheet_name='Summary')
@@ -2215,12 +2790,10 @@ elif st.session_state.page == "Export":
         
         col_stat1, col_stat2, col_stat3 = st.columns(3)
         with col_stat1:
-            st.metric("Total Records", len(df))
+            st.metric("Total Records", total_count)
         with col_stat2:
-            checked_in = len(df[df['status'] == 'checked_in'])
             st.metric("Checked In", checked_in)
         with col_stat3:
-            pending = len(df[df['status'] == 'registered'])
             st.metric("Pending", pending)
     
     else:
@@ -2228,13 +2801,4 @@ elif st.session_state.page == "Export":
 
 # Footer
 st.markdown("---")
-st.markdown("""
-<div style="text-align: center; color: #666; font-size: 0.9em; padding: 20px 0;">
-    <p><strong>Rooted World Tour Emergency Registration System • v3.0</strong></p>
-    <p>Mobile Registration & QR Code Check-in System</p>
-    <p>For support: tech@rootedworldtour.com • (555) 123-HELP</p>
-    <p style="font-size: 0.8em; margin-top: 10px;">
-        🛠️ Built with Streamlit • 📱 Mobile Optimized • 🔒 Secure • ☁️ Google Drive Sync
-    </p>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
@@ -1,17 +1,130 @@
-import qrcode
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+import numpy as np
 import io
+import os
 import streamlit as st
-import uuid
+import secrets
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# segno encodes much faster than qrcode; keep qrcode as the fallback
+try:
+    import segno
+    SEGNO_AVAILABLE = True
+except ImportError:
+    SEGNO_AVAILABLE = False
+
+# Instruction lines printed under the QR codes
+REGISTRATION_INSTRUCTIONS = (
+    "1. Scan with phone camera",
+    "2. Complete registration form",
+    "3. Receive your digital ticket"
+)
+
+SCAN_TO_CHECKIN_INSTRUCTIONS = (
+    "Scan this QR code at the event",
+    "for instant check-in"
+)
+
+CHECKIN_INSTRUCTIONS = (
+    "📱 CHECK-IN INSTRUCTIONS:",
+    "1. Present this QR code at event entry",
+    "2. Staff will scan with phone or webcam",
+    "3. Instant verification and entry",
+    "4. Keep this ticket safe!"
+)
+
+# Characters QR alphanumeric mode can encode
+_QR_ALPHANUMERIC = frozenset("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:")
+
+def _qr_mode(data):
+    """The QR encoding mode a string needs: numeric, alphanumeric or byte"""
+    if data.isascii() and data.isdigit():
+        return 'numeric'
+    if _QR_ALPHANUMERIC.issuperset(data):
+        return 'alphanumeric'
+    return 'byte'
 
 class EventQRGenerator:
+    # APP_URL from secrets, shared by every instance
+    _base_url = None
+    # Parsed TrueType fonts shared by every instance, keyed by (file, size)
+    _fonts = {}
+    # Static check-in ticket layouts, keyed by QR image size
+    _ticket_templates = {}
+    # Smallest QR version that fits, keyed by (UTF-8 data length, encoding mode)
+    _qr_versions = {}
+    
     def __init__(self):
-        self.base_url = st.secrets.get("APP_URL", "https://worship-court-ew5d8shfk5zqvypkg5tyvr.streamlit.app/")
+        # Secrets are read from TOML; look APP_URL up once per process
+        if EventQRGenerator._base_url is None:
+            EventQRGenerator._base_url = st.secrets.get("APP_URL", "https://worship-court-ew5d8shfk5zqvypkg5tyvr.streamlit.app/")
+        self.base_url = EventQRGenerator._base_url
     
     def generate_ticket_id(self, prefix="RWT"):
         """Generate unique ticket ID with prefix"""
-        unique_id = str(uuid.uuid4())[:8].upper()
-        return f"{prefix}-{unique_id}"
+        # 4 random bytes give the same 8 hex characters as a sliced uuid4
+        return f"{prefix}-{secrets.token_hex(4).upper()}"
+    
+    def _get_font(self, name, size):
+        """Load a font once per process; falls back to the default font"""
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            try:
+                font = ImageFont.truetype(name, size)
+            except OSError:
+                # Cache the fallback too, so a missing file isn't retried per ticket
+                font = ImageFont.load_default()
+            # Sessions share one generator; setdefault keeps racing loads
+            # converging on the same object
+            font = self._fonts.setdefault(key, font)
+        return font
+    
+    def _make_qr_image(self, data, version, box_size, border, fill_color):
+        """Render a high error-correction QR code as an RGB image"""
+        # Ticket and registration URLs only vary in content, not length, so the
+        # symbol version found for the first one fits every later one. Capacity
+        # also depends on the encoding mode, so that is part of the key
+        key = (len(data.encode('utf-8')), _qr_mode(data))
+        known = self._qr_versions.get(key)
+        
+        if SEGNO_AVAILABLE:
+            try:
+                qr = segno.make_qr(data, error='h', version=known)
+            except segno.DataOverflowError:
+                # Content the mode check didn't foresee; search again
+                known = None
+                qr = segno.make_qr(data, error='h')
+            if known is None:
+                self._qr_versions[key] = max(qr.version, self._qr_versions.get(key, 0))
+            return self._render_modules(qr.matrix, box_size, border, fill_color)
+        
+        import qrcode
+        qr = qrcode.QRCode(
+            version=known or version,
+            error_correction=qrcode.constants.ERROR_CORRECT_H,
+            box_size=box_size,
+            border=border,
+        )
+        qr.add_data(data)
+        # Skip the capacity search once the version for this length is known
+        try:
+            qr.make(fit=known is None)
+        except qrcode.exceptions.DataOverflowError:
+            known = qr.version = None
+            qr.make(fit=True)
+        if known is None:
+            self._qr_versions[key] = max(qr.version, self._qr_versions.get(key, 0))
+        # get_matrix() already includes the quiet zone
+        return self._render_modules(qr.get_matrix(), box_size, 0, fill_color)
+    
+    def _render_modules(self, matrix, box_size, border, fill_color):
+        """Scale a module matrix to pixels with NumPy instead of drawing each square"""
+        modules = np.pad(np.array([list(row) for row in matrix], dtype=bool), border)
+        pixels = modules.repeat(box_size, axis=0).repeat(box_size, axis=1)
+        palette = np.array([(255, 255, 255), ImageColor.getrgb(fill_color)], dtype=np.uint8)
+        return Image.fromarray(palette[pixels.view(np.uint8)], 'RGB')
     
     def create_registration_qr(self, ticket_id=None, registration_url=None):
         """Generate QR code for registration - works with or without ticket_id"""
@@ -27,19 +140,9 @@ class EventQRGenerator:
             else:
                 registration_url = f"{self.base_url}/?page=Register"
         
-        # Create QR code
-        qr = qrcode.QRCode(
-            version=2,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-        
-        qr.add_data(registration_url)
-        qr.make(fit=True)
-        
-        # Get QR code image as RGB
-        qr_img = qr.make_image(fill_color="#4CAF50", back_color="white").convert('RGB')
+        # Create QR code image as RGB
+        qr_img = self._make_qr_image(registration_url, version=2, box_size=10,
+                                     border=4, fill_color="#4CAF50")
         
         # Get QR code dimensions
         qr_width, qr_height = qr_img.size
@@ -47,6 +150,7 @@ class EventQRGenerator:
         # Create final image with exact dimensions
         final_width = max(400, qr_width + 100)  # Ensure minimum width
         final_height = qr_height + 180  # Add space for text
+        cx = final_width // 2  # Every line is centred on this
         
         final_img = Image.new('RGB', (final_width, final_height), color='white')
         
@@ -60,23 +164,17 @@ class EventQRGenerator:
         # Add text
         draw = ImageDraw.Draw(final_img)
         
-        # Try to load font
-        try:
-            font_large = ImageFont.truetype("Arial.ttf", 24)
-            font_medium = ImageFont.truetype("Arial.ttf", 18)
-            font_small = ImageFont.truetype("Arial.ttf", 14)
-        except:
-            # Use default font if Arial not available
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
+        # Load fonts (cached after the first ticket)
+        font_large = self._get_font("Arial.ttf", 24)
+        font_medium = self._get_font("Arial.ttf", 18)
+        font_small = self._get_font("Arial.ttf", 14)
         
         # Calculate text positions
         text_y = qr_y + qr_height + 20
         
         # Add ticket ID (only if provided)
         if ticket_id:
-            draw.text((final_width // 2, text_y), 
+            draw.text((cx, text_y), 
                      f"Ticket: {ticket_id}", 
                      fill="black", 
                      font=font_medium, 
@@ -85,13 +183,13 @@ class EventQRGenerator:
         
         # Add title based on context
         if "checkin" in registration_url.lower():
-            draw.text((final_width // 2, text_y), 
+            draw.text((cx, text_y), 
                      "Check-in QR Code", 
                      fill="#4CAF50", 
                      font=font_large, 
                      anchor="mm")
         else:
-            draw.text((final_width // 2, text_y), 
+            draw.text((cx, text_y), 
                      "Mobile Registration", 
                      fill="#4CAF50", 
                      font=font_large, 
@@ -99,26 +197,19 @@ class EventQRGenerator:
         
         # Add instructions
         if "checkin" in registration_url.lower():
-            instructions = [
-                "Scan this QR code at the event",
-                "for instant check-in"
-            ]
+            instructions = SCAN_TO_CHECKIN_INSTRUCTIONS
         else:
-            instructions = [
-                "1. Scan with phone camera",
-                "2. Complete registration form",
-                "3. Receive your digital ticket"
-            ]
+            instructions = REGISTRATION_INSTRUCTIONS
         
         for i, line in enumerate(instructions):
-            draw.text((final_width // 2, text_y + 35 + (i * 25)), 
+            draw.text((cx, text_y + 35 + (i * 25)), 
                      line, 
                      fill="#666666", 
                      font=font_small, 
                      anchor="mm")
         
         # Add branding
-        draw.text((final_width // 2, final_height - 30), 
+        draw.text((cx, final_height - 30), 
                  "Rooted World Tour", 
                  fill="#1a5319", 
                  font=font_medium, 
@@ -126,74 +217,45 @@ class EventQRGenerator:
         
         return final_img
     
-    def create_checkin_qr(self, ticket_id):
-        """Create QR code for check-in (after registration)"""
-        # URL that mobile cameras will recognize
-        checkin_url = f"{self.base_url}/?ticket={ticket_id}&action=checkin"
-        
-        # Make the QR code robust
-        qr = qrcode.QRCode(
-            version=3,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=12,
-            border=4,
-        )
-        qr.add_data(checkin_url)
-        qr.make(fit=True)
-        
-        qr_img = qr.make_image(fill_color="#1a5319", back_color="white")
-        qr_img = qr_img.convert('RGB')
-        
-        # Get QR code dimensions
-        qr_width, qr_height = qr_img.size
+    def _build_ticket_template(self, qr_size):
+        """Render the static check-in ticket chrome around a QR of the given size"""
+        qr_width, qr_height = qr_size
         
         # Create ticket design
         final_width = max(400, qr_width + 100)  # Ensure minimum width
         final_height = qr_height + 180  # Add space for text
+        cx = final_width // 2  # Every line is centred on this
         
         final_img = Image.new('RGB', (final_width, final_height), color='white')
         draw = ImageDraw.Draw(final_img)
         
-        # Add header with gradient
-        for i in range(60):
-            y = i
-            draw.rectangle([0, y, final_width, y+1], fill=(26, 83, 25))
+        # Add header band
+        draw.rectangle([0, 0, final_width, 60], fill=(26, 83, 25))
         
-        # Try to load fonts
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 28)
-            font_subtitle = ImageFont.truetype("arial.ttf", 18)
-            font_medium = ImageFont.truetype("arial.ttf", 20)
-            font_small = ImageFont.truetype("arial.ttf", 14)
-            font_tiny = ImageFont.truetype("arial.ttf", 12)
-        except:
-            # Fallback to default fonts
-            font_title = ImageFont.load_default()
-            font_subtitle = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-            font_tiny = ImageFont.load_default()
+        # Load fonts (cached after the first ticket)
+        font_title = self._get_font("arial.ttf", 28)
+        font_subtitle = self._get_font("arial.ttf", 18)
+        font_medium = self._get_font("arial.ttf", 20)
+        font_small = self._get_font("arial.ttf", 14)
+        font_tiny = self._get_font("arial.ttf", 12)
         
         # Event title
-        draw.text((final_width // 2, 30),
+        draw.text((cx, 30),
                  "🌿 ROOTED WORLD TOUR",
                  fill="white",
                  font=font_title,
                  anchor="mm")
         
-        draw.text((final_width // 2, 65),
+        draw.text((cx, 65),
                  "Worship Night Encounter",
                  fill="#FFD700",
                  font=font_subtitle,
                  anchor="mm")
         
-        # Add QR code
-        qr_width, qr_height = qr_img.size
+        # QR code position
         qr_x = (final_width - qr_width) // 2
         qr_y = 120
         
-        final_img.paste(qr_img, (qr_x, qr_y))
-        
         # Ticket info box
         info_y = qr_y + qr_height + 30
         draw.rectangle([50, info_y, final_width-50, info_y + 120], 
@@ -201,67 +263,105 @@ class EventQRGenerator:
                       outline="#4CAF50", 
                       width=2)
         
-        # Ticket ID
-        draw.text((final_width // 2, info_y + 25),
-                 f"🎫 TICKET ID: {ticket_id}",
-                 fill="#1a5319",
-                 font=font_medium,
-                 anchor="mm")
-        
         # Check-in instructions
-        instructions = [
-            "📱 CHECK-IN INSTRUCTIONS:",
-            "1. Present this QR code at event entry",
-            "2. Staff will scan with phone or webcam",
-            "3. Instant verification and entry",
-            "4. Keep this ticket safe!"
-        ]
-        
-        for i, instruction in enumerate(instructions):
+        for i, instruction in enumerate(CHECKIN_INSTRUCTIONS):
             y_pos = info_y + 50 + (i * 25)
             color = "#1a5319" if i == 0 else "#333333"
             font_size = font_medium if i == 0 else font_small
-            draw.text((final_width // 2, y_pos),
+            draw.text((cx, y_pos),
                      instruction,
                      fill=color,
                      font=font_size,
                      anchor="mm")
         
         # Mobile instructions
-        draw.text((final_width // 2, final_height - 60),
-                 "📱 MOBILE CHECK-IN: Open phone camera → Point at QR → Tap link",
+        mobile_xy = (cx, final_height - 60)
+        mobile_text = "📱 MOBILE CHECK-IN: Open phone camera → Point at QR → Tap link"
+        draw.text(mobile_xy,
+                 mobile_text,
                  fill="#4CAF50",
                  font=font_small,
                  anchor="mm")
         
         # Footer
-        draw.text((final_width // 2, final_height - 30),
+        draw.text((cx, final_height - 30),
                  "Digital Ticket • Valid for one entry",
                  fill="#666666",
                  font=font_tiny,
                  anchor="mm")
         
+        # The mobile line overlaps the bottom of the QR's (all-white) quiet
+        # zone, so only the QR rows above it are pasted per ticket
+        text_top = draw.textbbox(mobile_xy, mobile_text, font=font_small, anchor="mm")[1]
+        qr_rows = max(0, min(qr_height, text_top - qr_y))
+        
+        return final_img, (qr_x, qr_y), qr_rows, (cx, info_y + 25)
+    
+    def _compose_ticket(self, template, qr_box, qr_rows, ticket_text_xy, qr_img, ticket_id):
+        """Copy a ticket template and add the per-ticket QR code and ID"""
+        final_img = template.copy()
+        if qr_rows < qr_img.height:
+            qr_img = qr_img.crop((0, 0, qr_img.width, qr_rows))
+        final_img.paste(qr_img, qr_box)
+        
+        # Ticket ID; the only text that changes per ticket
+        ImageDraw.Draw(final_img).text(ticket_text_xy,
+                 f"🎫 TICKET ID: {ticket_id}",
+                 fill="#1a5319",
+                 font=self._get_font("arial.ttf", 20),
+                 anchor="mm")
+        
         return final_img
     
+    def create_checkin_qr(self, ticket_id):
+        """Create QR code for check-in (after registration)"""
+        # URL that mobile cameras will recognize
+        checkin_url = f"{self.base_url}/?ticket={ticket_id}&action=checkin"
+        
+        # Make the QR code robust
+        qr_img = self._make_qr_image(checkin_url, version=3, box_size=12,
+                                     border=4, fill_color="#1a5319")
+        
+        # Only the QR and ticket ID differ between tickets, so the rest of the
+        # design is rendered once per QR size and copied
+        layout = self._ticket_templates.get(qr_img.size)
+        if layout is None:
+            layout = self._ticket_templates.setdefault(
+                qr_img.size, self._build_ticket_template(qr_img.size)
+            )
+        template, qr_box, qr_rows, ticket_text_xy = layout
+        
+        return self._compose_ticket(template, qr_box, qr_rows, ticket_text_xy, qr_img, ticket_id)
+    
     def img_to_bytes(self, img):
-        """Convert PIL image to bytes for download"""
+        """Convert PIL image to PNG bytes for download"""
         buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        buf.seek(0)
-        return buf
+        # Flat two-colour QR art barely shrinks past zlib level 1, so take the fast tier
+        img.save(buf, format="PNG", optimize=False, compress_level=1)
+        return buf.getvalue()
+    
+    def _render_ticket_png(self, ticket_id):
+        """Render one ticket straight to PNG bytes so the RGB image can be freed"""
+        return self.img_to_bytes(self.create_checkin_qr(ticket_id))
     
     def generate_bulk_qr_codes(self, count, prefix="RWT"):
-        """Generate multiple QR codes for print"""
-        tickets = []
-        for i in range(count):
-            ticket_id = self.generate_ticket_id(prefix)
-            qr_img = self.create_checkin_qr(ticket_id)
-            tickets.append({
-                'ticket_id': ticket_id,
-                'qr_image': qr_img,
-                'qr_data': f"{self.base_url}/?ticket={ticket_id}&action=checkin"
-            })               
-        return tickets
+        """Generate multiple QR codes for print as a ZIP of PNGs plus a manifest"""
+        ticket_ids = [self.generate_ticket_id(prefix) for _ in range(count)]
+        manifest = []
+        buf = io.BytesIO()
+        # Workers only read the shared template and return encoded PNGs, so at
+        # most a few full-size images are alive at once. PNG data is already
+        # deflated, so ZIP entries are stored as-is
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor, \
+                zipfile.ZipFile(buf, 'w', zipfile.ZIP_STORED) as zf:
+            for ticket_id, png in zip(ticket_ids, executor.map(self._render_ticket_png, ticket_ids)):
+                zf.writestr(f"ticket_{ticket_id}.png", png)
+                manifest.append({
+                    'ticket_id': ticket_id,
+                    'qr_data': f"{self.base_url}/?ticket={ticket_id}&action=checkin"
+                })
+        buf.seek(0)
+        return buf, manifest
 
 # Use this class as BarcodeGenerator
 BarcodeGenerator = EventQRGenerator
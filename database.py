@@ -1,23 +1,154 @@
 import sqlite3
+import json
+import threading
+import time
+import queue
+from contextlib import contextmanager
+from functools import cached_property
+from operator import itemgetter
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import streamlit as st
 
+def _clean_phone(df):
+    """Strip thousands separators from the phone column in one vectorized pass"""
+    if 'phone' in df.columns:
+        df['phone'] = df['phone'].astype('string').str.replace(',', '', regex=False).fillna('')
+
+# Stored in PRAGMA user_version once update_database_schema has run
+SCHEMA_VERSION = 1
+
+def _convert_timestamp(value):
+    """Parse a stored timestamp; anything that isn't ISO format comes back as None"""
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        return None
+
+# Columns aliased as "name [iso_timestamp]" come back as datetimes
+sqlite3.register_converter("iso_timestamp", _convert_timestamp)
+
+# UPDATE ... RETURNING arrived in SQLite 3.35
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# FTS5's trigram tokenizer arrived in SQLite 3.34
+SQLITE_HAS_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+_REGISTRATION_DEFAULTS = {
+    'first_name': '',
+    'last_name': '',
+    'email': '',
+    'phone': '',
+    'emergency_contact': '',
+    'medical_notes': '',
+    'worship_team': 0,
+    'volunteer': 0,
+    'scanned_data': 'manual_registration'
+}
+
+_INSERT_REGISTRATION = '''
+INSERT INTO registrations 
+(ticket_id, first_name, last_name, email, phone, 
+ emergency_contact, medical_notes, worship_team, volunteer, scanned_data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Pulls the INSERT parameters out of a defaults-filled registration dict
+_registration_row = itemgetter(
+    'ticket_id', 'first_name', 'last_name', 'email', 'phone',
+    'emergency_contact', 'medical_notes', 'worship_team', 'volunteer', 'scanned_data'
+)
+
 class EventDatabase:
     def __init__(self, db_path="event_registration.db"):
         self.db_path = db_path
-        from barcode_generator import BarcodeGenerator
-        self.barcode_gen = BarcodeGenerator()
+        # One long-lived connection serves the hot paths (scans, lookups,
+        # counters) so Streamlit reruns don't reopen the file every time
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        # Idle read-only connections; WAL lets these run alongside the writer
+        self._readers = queue.SimpleQueue()
         self.init_db()
         self.update_database_schema()
     
+    @property
+    def data_version(self):
+        """Registrations write counter, kept in the file so every writer moves it"""
+        return self._read("SELECT version FROM data_version")[0]
+    
+    @cached_property
+    def barcode_gen(self):
+        """QR generator, imported and built on first use"""
+        from barcode_generator import BarcodeGenerator
+        return BarcodeGenerator()
+    
     def get_connection(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        # Wait out a concurrent writer instead of failing with "database is locked"
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30,
+                               cached_statements=256, detect_types=sqlite3.PARSE_COLNAMES)
+        # Under WAL, NORMAL only syncs at checkpoints and still can't corrupt the file
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # Read pages through a memory map rather than copying them into the page cache
+        conn.execute("PRAGMA mmap_size=268435456")
+        # INSERT OR REPLACE only fires delete triggers (which keep reg_fts
+        # in step) with recursive triggers on
+        conn.execute("PRAGMA recursive_triggers=ON")
+        return conn
+    
+    @contextmanager
+    def _shared(self):
+        """Hold the shared connection for one transaction, committing on success"""
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = self.get_connection()
+                # ~20 MB page cache, kept warm for the stats queries
+                self._conn.execute("PRAGMA cache_size=-20000")
+            with self._conn:
+                yield self._conn
+    
+    def _read(self, query, params=(), fetch_all=False):
+        """Run a read query on the shared connection"""
+        with self._shared() as conn:
+            cursor = conn.execute(query, params)
+            return cursor.fetchall() if fetch_all else cursor.fetchone()
+    
+    @contextmanager
+    def _reader(self):
+        """Borrow a pooled connection for a read that may take a while"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    def close(self):
+        """Close the shared connection and any pooled readers"""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
     
     def init_db(self):
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # WAL lets check-in writes proceed while dashboards read (persists in the file)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
+        # All of the DDL below commits together: one journal sync on first
+        # startup instead of one per statement
+        cursor.execute("BEGIN")
+        
         # Enhanced registrations table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS registrations (
@@ -40,6 +171,77 @@ class EventDatabase:
         )
         ''')
         
+        # Export and dashboard filters go by status and registration time
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_reg_status_time ON registrations(status, registration_time DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_reg_time ON registrations(registration_time)")
+        # Today's hourly check-ins read a status + check-in time range
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_reg_status_checkin ON registrations(status, checkin_time)")
+        
+        # Write counter for cache keys. Triggers bump it on every registrations
+        # change, whichever connection or process makes it; a new file starts
+        # from the clock, so its versions never repeat an earlier file's
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, ?)", (time.time_ns(),))
+        for trigger, event in (('reg_version_ai', 'INSERT'), ('reg_version_au', 'UPDATE'),
+                               ('reg_version_ad', 'DELETE')):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON registrations BEGIN
+                UPDATE data_version SET version = version + 1;
+            END
+            ''')
+        
+        # Trigram index for search, kept in step with registrations by
+        # triggers; trigrams match anywhere in a value, like '%term%' did
+        self.has_fts = False
+        try:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'reg_fts'")
+            existing = cursor.fetchone()
+            if not SQLITE_HAS_TRIGRAM:
+                raise sqlite3.OperationalError("trigram tokenizer needs SQLite 3.34")
+            if existing and 'trigram' not in existing[0]:
+                # Word-token index from an earlier version; rebuilt below
+                cursor.execute("DROP TABLE reg_fts")
+                existing = None
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS reg_fts USING fts5(
+                first_name, last_name, email, ticket_id,
+                content='registrations', content_rowid='id', tokenize='trigram'
+            )
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS reg_fts_ai AFTER INSERT ON registrations BEGIN
+                INSERT INTO reg_fts (rowid, first_name, last_name, email, ticket_id)
+                VALUES (new.id, new.first_name, new.last_name, new.email, new.ticket_id);
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS reg_fts_ad AFTER DELETE ON registrations BEGIN
+                INSERT INTO reg_fts (reg_fts, rowid, first_name, last_name, email, ticket_id)
+                VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.ticket_id);
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS reg_fts_au
+            AFTER UPDATE OF first_name, last_name, email, ticket_id ON registrations BEGIN
+                INSERT INTO reg_fts (reg_fts, rowid, first_name, last_name, email, ticket_id)
+                VALUES ('delete', old.id, old.first_name, old.last_name, old.email, old.ticket_id);
+                INSERT INTO reg_fts (rowid, first_name, last_name, email, ticket_id)
+                VALUES (new.id, new.first_name, new.last_name, new.email, new.ticket_id);
+            END
+            ''')
+            if not existing:
+                # Index the rows that were there before the table existed
+                cursor.execute("INSERT INTO reg_fts (reg_fts) VALUES ('rebuild')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite without FTS5 or the trigram tokenizer: search falls back to LIKE
+            pass
+        
         # Events table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS events (
@@ -77,6 +279,10 @@ class EventDatabase:
         cursor = conn.cursor()
         
         try:
+            # Databases already migrated to this version skip the column checks
+            if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return
+            
             # Check if scanned_data column exists
             cursor.execute("PRAGMA table_info(registrations)")
             columns = [column[1] for column in cursor.fetchall()]
@@ -91,10 +297,13 @@ class EventDatabase:
                 ('synced_to_cloud', 'INTEGER DEFAULT 0')
             ]
             
+            # One transaction for every ALTER and the version stamp
+            cursor.execute("BEGIN")
             for column_name, column_type in columns_to_add:
                 if column_name not in columns:
                     cursor.execute(f"ALTER TABLE registrations ADD COLUMN {column_name} {column_type}")
                     print(f"Added {column_name} column")
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             
             conn.commit()
             print("Database schema updated successfully")
@@ -106,124 +315,127 @@ class EventDatabase:
     
     def create_event(self, event_name, event_date, location, capacity=1000):
         """Create a new event"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         # Generate registration URL with unique ID
         import uuid
         event_code = str(uuid.uuid4())[:8]
         registration_url = f"https://rooted-world-tour.streamlit.app/?event={event_code}"
         
-        cursor.execute('''
-        INSERT INTO events (event_name, event_date, location, capacity, registration_url)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (event_name, event_date, location, capacity, registration_url))
-        
-        event_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._shared() as conn:
+            cursor = conn.execute('''
+            INSERT INTO events (event_name, event_date, location, capacity, registration_url)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (event_name, event_date, location, capacity, registration_url))
+            event_id = cursor.lastrowid
         
         return event_id, registration_url
     
     def add_registration(self, data):
         """Add a new registration with all required fields"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         # Generate ticket ID if not provided
         if 'ticket_id' not in data or not data['ticket_id']:
             data['ticket_id'] = self.barcode_gen.generate_ticket_id()
         
-        # Generate CHECK-IN QR code
-        qr_img = self.barcode_gen.create_checkin_qr(data['ticket_id'])
-        
         # Ensure all required fields have defaults
-        registration_data = {
-            'ticket_id': data['ticket_id'],
-            'first_name': data.get('first_name', ''),
-            'last_name': data.get('last_name', ''),
-            'email': data.get('email', ''),
-            'phone': data.get('phone', ''),
-            'emergency_contact': data.get('emergency_contact', ''),
-            'medical_notes': data.get('medical_notes', ''),
-            'worship_team': data.get('worship_team', 0),
-            'volunteer': data.get('volunteer', 0),
-            'scanned_data': data.get('scanned_data', 'manual_registration')
-        }
+        row = _registration_row({**_REGISTRATION_DEFAULTS, **data})
         
         try:
-            cursor.execute('''
-            INSERT INTO registrations 
-            (ticket_id, first_name, last_name, email, phone, 
-             emergency_contact, medical_notes, worship_team, volunteer, scanned_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                registration_data['ticket_id'],
-                registration_data['first_name'],
-                registration_data['last_name'],
-                registration_data['email'],
-                registration_data['phone'],
-                registration_data['emergency_contact'],
-                registration_data['medical_notes'],
-                registration_data['worship_team'],
-                registration_data['volunteer'],
-                registration_data['scanned_data']
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            return True, "Registration successful!", data['ticket_id'], qr_img
-            
+            with self._shared() as conn:
+                conn.execute(_INSERT_REGISTRATION, row)
         except sqlite3.IntegrityError:
-            conn.close()
             return False, "Ticket ID already exists!", None, None
         except Exception as e:
-            conn.close()
             return False, f"Error: {str(e)}", None, None
+        
+        # Generate CHECK-IN QR code only once the ticket is actually stored
+        qr_img = self.barcode_gen.create_checkin_qr(data['ticket_id'])
+        return True, "Registration successful!", data['ticket_id'], qr_img
+    
+    def add_registrations_bulk(self, records):
+        """Insert many registrations in one transaction; returns (success, message)"""
+        rows = [_registration_row({**_REGISTRATION_DEFAULTS, **data}) for data in records]
+        
+        try:
+            with self._shared() as conn:
+                conn.executemany(_INSERT_REGISTRATION, rows)
+            return True, f"Added {len(rows)} registrations"
+        except sqlite3.IntegrityError:
+            return False, "A ticket ID already exists; nothing was added"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def _checkin_where(self, conn, where, params):
+        """Check in registered rows matching `where`; returns (first, last) of one, or None"""
+        update = (
+            "UPDATE registrations SET checkin_time = ?, status = 'checked_in' "
+            f"WHERE {where} AND status = 'registered'"
+        )
+        if SQLITE_HAS_RETURNING:
+            # The names come back with the update, no second statement needed
+            rows = conn.execute(update + " RETURNING first_name, last_name", params).fetchall()
+            return rows[0] if rows else None
+        
+        if conn.execute(update, params).rowcount == 0:
+            return None
+        return conn.execute(
+            f"SELECT first_name, last_name FROM registrations WHERE {where}", params[1:]
+        ).fetchone()
     
     def quick_checkin(self, ticket_id):
         """Quick check-in using ticket ID or barcode scan"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # First try exact ticket ID match
-        cursor.execute('''
-        UPDATE registrations 
-        SET checkin_time = ?, status = 'checked_in'
-        WHERE ticket_id = ? AND status = 'registered'
-        ''', (datetime.now(), ticket_id))
-        
-        if cursor.rowcount == 0:
-            # Try partial match
-            cursor.execute('''
-            UPDATE registrations 
-            SET checkin_time = ?, status = 'checked_in'
-            WHERE ticket_id LIKE ? AND status = 'registered'
-            ''', (datetime.now(), f"%{ticket_id}%"))
-        
-        conn.commit()
-        updated = cursor.rowcount > 0
+        now = datetime.now()
+        pattern = f"%{ticket_id}%"
+        result = None
+        with self._shared() as conn:
+            # First try exact ticket ID match, then a partial match
+            attendee = self._checkin_where(conn, "ticket_id = ?", (now, ticket_id))
+            if attendee is None:
+                attendee = self._checkin_where(conn, "ticket_id LIKE ?", (now, pattern))
+            if attendee is None:
+                result = conn.execute(
+                    'SELECT first_name, last_name, status FROM registrations WHERE ticket_id LIKE ?',
+                    (pattern,)
+                ).fetchone()
+        
+        if attendee is not None:
+            return True, (attendee[0], attendee[1])
+        
+        # Check if already checked in
+        if result and result[2] == 'checked_in':
+            return False, (result[0], result[1])  # Return attendee info
+        return False, None
+    
+    def get_attendee(self, ticket_id):
+        """Return (first_name, last_name, status) for an exact ticket ID, or None"""
+        return self._read(
+            "SELECT first_name, last_name, status FROM registrations WHERE ticket_id = ?",
+            (ticket_id,)
+        )
+    
+    def checkin_all_registered(self):
+        """Check in every attendee still marked registered; returns the count"""
+        with self._shared() as conn:
+            updated = conn.execute(
+                "UPDATE registrations SET status = 'checked_in', checkin_time = CURRENT_TIMESTAMP WHERE status = 'registered'"
+            ).rowcount
+        return updated
+    
+    def get_database_info(self):
+        """Record and table counts plus file size, in one round trip"""
+        import os
         
-        if updated:
-            cursor.execute('SELECT first_name, last_name FROM registrations WHERE ticket_id LIKE ?', (f"%{ticket_id}%",))
-            attendee = cursor.fetchone()
-            conn.close()
-            return True, attendee
-        else:
-            # Check if already checked in
-            cursor.execute('SELECT first_name, last_name, status FROM registrations WHERE ticket_id LIKE ?', (f"%{ticket_id}%",))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result and result[2] == 'checked_in':
-                return False, (result[0], result[1])  # Return attendee info
-            return False, None
+        total, tables = self._read(
+            "SELECT (SELECT COUNT(*) FROM registrations), "
+            "(SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name != 'data_version' "
+            "AND name NOT LIKE 'reg\\_fts%' ESCAPE '\\')"
+        )
+        try:
+            size = os.stat(self.db_path).st_size
+        except FileNotFoundError:
+            size = None
+        return {'total': total, 'tables': tables, 'size_bytes': size}
     
     def get_dashboard_stats(self, event_date=None):
         """Get comprehensive dashboard statistics"""
-        conn = self.get_connection()
-        
         stats = {}
         
         # Base query with COALESCE to handle NULL values
@@ -232,7 +444,13 @@ class EventDatabase:
         query += "COALESCE(SUM(CASE WHEN status = 'checked_in' THEN 1 ELSE 0 END), 0) as checked_in, "
         query += "COALESCE(SUM(CASE WHEN worship_team = 1 THEN 1 ELSE 0 END), 0) as worship_team, "
         query += "COALESCE(SUM(CASE WHEN volunteer = 1 THEN 1 ELSE 0 END), 0) as volunteers, "
-        query += "COUNT(DISTINCT date(registration_time)) as active_days "
+        query += "COUNT(DISTINCT date(registration_time)) as active_days, "
+        # Today's hourly check-ins ride along as a JSON object in the same row
+        query += "(SELECT json_group_object(hour, count) FROM ("
+        query += "SELECT strftime('%H', checkin_time) as hour, COUNT(*) as count "
+        query += "FROM registrations WHERE status = 'checked_in' "
+        query += "AND checkin_time >= date('now') AND checkin_time < date('now', '+1 day') "
+        query += "GROUP BY hour HAVING hour IS NOT NULL ORDER BY hour)) as hourly "
         query += "FROM registrations"
         
         params = ()
@@ -241,9 +459,7 @@ class EventDatabase:
             query += " WHERE date(registration_time) = ?"
             params = (event_date,)
         
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        result = cursor.fetchone()
+        result = self._read(query, params)
         
         # Initialize all stats with 0 to avoid None values
         stats['total'] = result[0] or 0 if result else 0
@@ -260,72 +476,78 @@ class EventDatabase:
         else:
             stats['checkin_rate'] = "0%"
         
-        # Hourly check-ins for today
-        cursor.execute('''
-        SELECT strftime('%H', checkin_time) as hour, COUNT(*) as count
-        FROM registrations 
-        WHERE date(checkin_time) = date('now') 
-        AND status = 'checked_in'
-        AND checkin_time IS NOT NULL
-        GROUP BY hour
-        ORDER BY hour
-        ''')
+        # Hourly check-ins for today, one bucket per hour of the day
+        hourly = np.zeros(24, dtype=np.int32)
+        for hour, count in (json.loads(result[5]) if result and result[5] else {}).items():
+            hourly[int(hour)] = count
+        stats['hourly_checkins'] = hourly
         
-        hourly_data = cursor.fetchall()
-        stats['hourly_checkins'] = {str(hour): count for hour, count in hourly_data}
-        
-        conn.close()
         return stats
     
     def search_registrations(self, search_term):
         """Search registrations by name, email, or ticket ID"""
-        conn = self.get_connection()
-        
-        query = '''
-        SELECT ticket_id, first_name, last_name, email, phone, status, 
-               datetime(registration_time) as reg_time
-        FROM registrations
-        WHERE first_name LIKE ? OR last_name LIKE ? OR email LIKE ? OR ticket_id LIKE ?
-        ORDER BY registration_time DESC
-        LIMIT 50
-        '''
-        
-        search_pattern = f"%{search_term}%"
-        df = pd.read_sql_query(query, conn, params=(search_pattern, search_pattern, 
-                                                   search_pattern, search_pattern))
-        conn.close()
-        
-        if 'phone' in df.columns:
-            df['phone'] = df['phone'].astype(str)
-            df['phone'] = df['phone'].apply(lambda x: str(x).replace(',', '') if pd.notna(x) else '')
+        # Trigrams need at least three characters; shorter terms use LIKE
+        if self.has_fts and len(search_term) >= 3:
+            # One quoted string, so punctuation in emails and ticket IDs
+            # can't be read as FTS5 query syntax
+            match = '"' + search_term.replace('"', '""') + '"'
+            query = '''
+            SELECT r.ticket_id, r.first_name, r.last_name, r.email, r.phone, r.status, 
+                   r.registration_time as "reg_time [iso_timestamp]"
+            FROM reg_fts f
+            JOIN registrations r ON r.id = f.rowid
+            WHERE reg_fts MATCH ?
+            ORDER BY r.registration_time DESC
+            LIMIT 50
+            '''
+            params = (match,)
+        else:
+            query = '''
+            SELECT ticket_id, first_name, last_name, email, phone, status, 
+                   registration_time as "reg_time [iso_timestamp]"
+            FROM registrations
+            WHERE first_name LIKE ? OR last_name LIKE ? OR email LIKE ? OR ticket_id LIKE ?
+            ORDER BY registration_time DESC
+            LIMIT 50
+            '''
+            search_pattern = f"%{search_term}%"
+            params = (search_pattern, search_pattern, search_pattern, search_pattern)
+        
+        with self._reader() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        
+        _clean_phone(df)
 
         return df
     
     def get_recent_registrations(self, limit=20):
         """Get recent registrations"""
-        conn = self.get_connection()
-        
-        query = f'''
+        query = '''
         SELECT ticket_id, first_name, last_name, email, status, 
-               datetime(registration_time) as reg_time
+               registration_time as "reg_time [iso_timestamp]"
         FROM registrations
         ORDER BY registration_time DESC
-        LIMIT {limit}
+        LIMIT ?
         '''
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        with self._reader() as conn:
+            df = pd.read_sql_query(query, conn, params=(limit,))
         
-        if 'phone' in df.columns:
-            df['phone'] = df['phone'].astype(str)
-            df['phone'] = df['phone'].apply(lambda x: str(x).replace(',', '') if pd.notna(x) else '')
+        _clean_phone(df)
         
         return df
     
+    def iter_registrations(self, query, params=()):
+        """Yield the column names, then each row, of a registrations query"""
+        # A pooled reader, so a long stream doesn't hold the shared connection
+        with self._reader() as conn:
+            cursor = conn.execute(query, params)
+            yield [column[0] for column in cursor.description]
+            yield from cursor
+    
     def backup_database(self, backup_dir="backups"):
         """Create a backup of the database"""
         import os
-        import shutil
         from datetime import datetime
         
         try:
@@ -336,8 +558,14 @@ class EventDatabase:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = os.path.join(backup_dir, f"event_registration_backup_{timestamp}.db")
             
-            # Copy the database file
-            shutil.copy2(self.db_path, backup_path)
+            # SQLite's online backup copies a consistent snapshot, including
+            # pages still in the WAL, while other connections keep writing
+            dst = sqlite3.connect(backup_path)
+            try:
+                with self._reader() as src:
+                    src.backup(dst)
+            finally:
+                dst.close()
             
             # Also export to CSV
             csv_path = os.path.join(backup_dir, f"registrations_backup_{timestamp}.csv")
@@ -348,52 +576,67 @@ class EventDatabase:
         except Exception as e:
             raise Exception(f"Backup failed: {str(e)}")
 
+    def _write_csv(self, f):
+        """Stream every registration into a text file object; returns the row count"""
+        import csv
+        
+        rows = self.iter_registrations("SELECT * FROM registrations")
+        columns = next(rows)
+        phone_idx = columns.index('phone') if 'phone' in columns else None
+        
+        written = 0
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            if phone_idx is not None:
+                row = list(row)
+                phone = row[phone_idx]
+                row[phone_idx] = str(phone).replace(',', '') if phone is not None else ''
+            writer.writerow(row)
+            written += 1
+        return written
+
     def export_to_csv(self, filepath):
-        """Export all registrations to CSV"""
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM registrations", conn)
-        conn.close()
+        """Export all registrations to CSV, streaming rows from the cursor"""
+        import os
         
-        if 'phone' in df.columns:
-            df['phone'] = df['phone'].astype(str)
-            df['phone'] = df['phone'].apply(lambda x: str(x).replace(',', '') if pd.notna(x) else '')
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            written = self._write_csv(f)
         
-        if not df.empty:
-            df.to_csv(filepath, index=False)
-            return True
-        return False
+        if not written:
+            os.remove(filepath)
+            return False
+        return True
+
+    def export_to_csv_bytes(self):
+        """Export all registrations as CSV bytes, or None if there are none"""
+        import io
+        
+        buf = io.StringIO(newline='')
+        if not self._write_csv(buf):
+            return None
+        return buf.getvalue().encode('utf-8')
 
     def import_from_csv(self, filepath):
-        """Import registrations from CSV"""
+        """Import registrations from CSV in a single batched insert"""
+        columns = ['ticket_id', 'first_name', 'last_name', 'email', 'phone', 'status',
+                   'registration_time', 'checkin_time', 'worship_team', 'volunteer']
         try:
             df = pd.read_csv(filepath)
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            df = df.reindex(columns=columns)
+            # Rows missing a required field would fail the NOT NULL constraints
+            df = df.dropna(subset=['first_name', 'last_name', 'email'])
+            df = df.fillna({'status': 'registered', 'worship_team': 0, 'volunteer': 0})
+            # Plain Python values with None for gaps, which sqlite3 can bind directly
+            df = df.astype(object).where(df.notna(), None)
             
-            for _, row in df.iterrows():
-                try:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO registrations 
-                    (ticket_id, first_name, last_name, email, phone, status, 
-                    registration_time, checkin_time, worship_team, volunteer)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row.get('ticket_id'),
-                        row.get('first_name'),
-                        row.get('last_name'),
-                        row.get('email'),
-                        row.get('phone'),
-                        row.get('status', 'registered'),
-                        row.get('registration_time'),
-                        row.get('checkin_time'),
-                        row.get('worship_team', 0),
-                        row.get('volunteer', 0)
-                    ))
-                except Exception as e:
-                    print(f"Error importing row: {e}")
-            
-            conn.commit()
-            conn.close()
+            with self._shared() as conn:
+                conn.executemany('''
+                INSERT OR REPLACE INTO registrations 
+                (ticket_id, first_name, last_name, email, phone, status, 
+                registration_time, checkin_time, worship_team, volunteer)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', df.itertuples(index=False, name=None))
             return True
             
         except Exception as e:
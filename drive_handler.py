@@ -4,6 +4,29 @@ import pandas as pd
 import streamlit as st
 from datetime import datetime
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+@st.cache_resource
+def _get_gspread_client(scope):
+    """Authorized gspread client shared by every session and rerun"""
+    if 'gcp_service_account' in st.secrets:
+        # Using Streamlit secrets
+        creds_dict = dict(st.secrets["gcp_service_account"])
+        creds = Credentials.from_service_account_info(creds_dict, scopes=list(scope))
+    else:
+        # Try local credentials file
+        import os
+        if not os.path.exists('credentials.json'):
+            # Raised rather than returned so the miss isn't cached
+            raise FileNotFoundError('credentials.json')
+        creds = Credentials.from_service_account_file('credentials.json', scopes=list(scope))
+    
+    client = gspread.authorize(creds)
+    # Keep-alive connections for the Sheets calls that run side by side
+    from requests.adapters import HTTPAdapter
+    client.session.mount("https://", HTTPAdapter(pool_maxsize=10))
+    return client
 
 class GoogleDriveHandler:
     def __init__(self):
@@ -11,26 +34,21 @@ class GoogleDriveHandler:
             "https://www.googleapis.com/auth/spreadsheets",
             "https://www.googleapis.com/auth/drive.file"
         ]
+        # One worker, so background syncs of the same sheet never interleave
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        # A queued sync that hasn't started yet; later requests share it
+        self._sync_lock = threading.Lock()
+        self._sync_queued = None
         self.init_credentials()
     
     def init_credentials(self):
         """Initialize Google Sheets credentials from Streamlit secrets"""
         try:
-            if 'gcp_service_account' in st.secrets:
-                # Using Streamlit secrets
-                creds_dict = dict(st.secrets["gcp_service_account"])
-                creds = Credentials.from_service_account_info(creds_dict, scopes=self.scope)
-            else:
-                # Try local credentials file
-                import os
-                if os.path.exists('credentials.json'):
-                    creds = Credentials.from_service_account_file('credentials.json', scopes=self.scope)
-                else:
-                    st.error("Google Cloud credentials not found. Please set up credentials.")
-                    return None
-            
-            self.client = gspread.authorize(creds)
+            self.client = _get_gspread_client(tuple(self.scope))
             return True
+        except FileNotFoundError:
+            st.error("Google Cloud credentials not found. Please set up credentials.")
+            return None
         except Exception as e:
             st.error(f"Error initializing Google Drive: {str(e)}")
             return False
@@ -66,60 +84,96 @@ class GoogleDriveHandler:
             st.error(f"Error creating spreadsheet: {str(e)}")
             return None, None
     
-    def sync_to_sheets(self, df, spreadsheet_id, sheet_name="Registrations"):
+    def sync_to_sheets(self, df, spreadsheet_id, sheet_name="Registrations", stats=None):
         """Sync local database to Google Sheets"""
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            worksheet = spreadsheet.worksheet(sheet_name)
-            
-            # Clear existing data except headers
-            worksheet.clear()
+            spreadsheet = self._write_rows(df, spreadsheet_id, sheet_name)
             
-            # Write headers
-            headers = df.columns.tolist()
-            worksheet.append_row(headers)
-            
-            # Write data
-            data = df.values.tolist()
-            if data:
-                worksheet.append_rows(data)
-            
-            # Update summary
-            self.update_summary(spreadsheet, df)
-            
-            return True
+            # Update summary; callers backed by a database pass its counts
+            if stats is None:
+                status_col = 'Status' if 'Status' in df.columns else 'status'
+                checked_in = int((df[status_col] == 'checked_in').sum()) if status_col in df.columns else 0
+                stats = {'total': len(df), 'checked_in': checked_in}
         except Exception as e:
             st.error(f"Error syncing to Google Sheets: {str(e)}")
             return False
+        self.update_summary(spreadsheet, stats)
+        
+        return True
     
-    def update_summary(self, spreadsheet, df):
-        """Update summary sheet with statistics"""
+    def _write_rows(self, df, spreadsheet_id, sheet_name):
+        """Replace a worksheet's contents with df; returns the spreadsheet"""
+        spreadsheet = self.client.open_by_key(spreadsheet_id)
+        worksheet = spreadsheet.worksheet(sheet_name)
+        
+        # Clear existing data, then write headers and rows in one request
+        worksheet.clear()
+        headers = df.columns.tolist()
+        spreadsheet.values_update(
+            f"{sheet_name}!A1",
+            params={'valueInputOption': 'RAW'},
+            body={'values': [headers] + df.values.tolist()}
+        )
+        return spreadsheet
+    
+    def sync_to_sheets_async(self, load, spreadsheet_id, sheet_name="Registrations"):
+        """Queue a background sync of the (df, stats) that load() returns, and
+        return its Future. A sync that hasn't started yet already covers this
+        request, so a burst of writes costs one upload"""
+        with self._sync_lock:
+            if self._sync_queued is None:
+                self._sync_queued = self._executor.submit(
+                    self._background_sync, load, spreadsheet_id, sheet_name
+                )
+            return self._sync_queued
+    
+    def _background_sync(self, load, spreadsheet_id, sheet_name):
+        # From here on, new writes need a sync of their own
+        with self._sync_lock:
+            self._sync_queued = None
         try:
-            summary_sheet = spreadsheet.worksheet("Summary")
-            summary_sheet.clear()
-            
-            # Summary headers
-            summary_sheet.append_row(["Metric", "Value", "Last Updated"])
-            
-            # Calculate metrics
-            total_registrations = len(df)
-            checked_in = len(df[df['Status'] == 'checked_in']) if 'Status' in df.columns else 0
-            pending = total_registrations - checked_in
-            
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            metrics = [
-                ["Total Registrations", total_registrations, now],
-                ["Checked In", checked_in, now],
-                ["Pending Check-in", pending, now],
-                ["Check-in Rate", f"{(checked_in/total_registrations*100):.1f}%" if total_registrations > 0 else "0%", now]
-            ]
-            
-            summary_sheet.append_rows(metrics)
-            
+            # Read on the worker, so the caller never waits on the table
+            df, stats = load()
+            spreadsheet = self._write_rows(df, spreadsheet_id, sheet_name)
+            self._write_summary(spreadsheet, stats)
+            return True
+        except Exception as e:
+            # No page to show st.error on from this thread
+            print(f"Background Google Sheets sync failed: {e}")
+            return False
+    
+    def update_summary(self, spreadsheet, stats):
+        """Update summary sheet from {'total', 'checked_in'} counts"""
+        try:
+            self._write_summary(spreadsheet, stats)
         except Exception as e:
             st.warning(f"Could not update summary: {str(e)}")
     
+    def _write_summary(self, spreadsheet, stats):
+        """Write the Summary sheet's metrics; raises on failure"""
+        # Calculate metrics
+        total_registrations = stats['total']
+        checked_in = stats['checked_in']
+        pending = total_registrations - checked_in
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        metrics = [
+            ["Metric", "Value", "Last Updated"],
+            ["Total Registrations", total_registrations, now],
+            ["Checked In", checked_in, now],
+            ["Pending Check-in", pending, now],
+            ["Check-in Rate", f"{(checked_in/total_registrations*100):.1f}%" if total_registrations > 0 else "0%", now]
+        ]
+        
+        # Same five rows every time, so overwriting in place needs no
+        # clear: headers and metrics go in one request
+        spreadsheet.values_update(
+            "Summary!A1",
+            params={'valueInputOption': 'RAW'},
+            body={'values': metrics}
+        )
+    
     def get_spreadsheet_data(self, spreadsheet_id):
         """Retrieve data from Google Sheets"""
         try:
@@ -196,10 +250,12 @@ class HybridDatabase:
             
             conn.commit()
             
-            # If Google Drive is enabled, sync
+            # If Google Drive is enabled, sync in the background so the
+            # registration returns without waiting on the Sheets API
             if self.use_google_drive and self.google_handler:
-                # This would sync in background
-                pass
+                spreadsheet_id = self.get_spreadsheet_id()
+                if spreadsheet_id:
+                    self.google_handler.sync_to_sheets_async(self._sync_snapshot, spreadsheet_id)
             
             return True, "Registration successful!"
             
@@ -209,3 +265,27 @@ class HybridDatabase:
             return False, f"Error: {str(e)}"
         finally:
             conn.close()
+    
+    def _sync_snapshot(self):
+        """Registrations and their counts for a Sheets sync; runs on the sync worker"""
+        conn = sqlite3.connect(self.local_db)
+        try:
+            df = pd.read_sql_query("SELECT * FROM registrations", conn)
+            total, checked_in = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(status = 'checked_in'), 0) FROM registrations"
+            ).fetchone()
+            return df, {'total': total, 'checked_in': checked_in}
+        finally:
+            conn.close()
+    
+    def get_spreadsheet_id(self):
+        """Spreadsheet of the most recently created event, if any"""
+        conn = sqlite3.connect(self.local_db)
+        try:
+            row = conn.execute(
+                "SELECT spreadsheet_id FROM events WHERE spreadsheet_id IS NOT NULL "
+                "ORDER BY created_at DESC LIMIT 1"
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
@@ -25,13 +25,16 @@ except ImportError as e:
     st.stop()
 
 # ── Initialize shared objects ────────────────────────────────────────
-if 'db' not in st.session_state:
-    st.session_state.db = EventDatabase()
-if 'barcode_gen' not in st.session_state:
-    st.session_state.barcode_gen = BarcodeGenerator()
+@st.cache_resource
+def _get_db():
+    return EventDatabase()
 
-db = st.session_state.db
-barcode_gen = st.session_state.barcode_gen
+@st.cache_resource
+def _get_barcode_gen():
+    return BarcodeGenerator()
+
+db = _get_db()
+barcode_gen = _get_barcode_gen()
 
 # ── UI ───────────────────────────────────────────────────────────────
 st.markdown("""
@@ -61,8 +64,9 @@ if form_valid:
 
             with col_left:
                 if qr_img:
-                    st.image(qr_img, use_column_width=True)
+                    # Encode once; the preview and the download share the PNG
                     qr_bytes = barcode_gen.img_to_bytes(qr_img)
+                    st.image(qr_bytes, use_column_width=True)
                     st.download_button(
                         "⬇️ Download QR Code",
                         data=qr_bytes,
@@ -1,14 +1,124 @@
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-from datetime import datetime, timedelta
+from functools import lru_cache
+import importlib.util
+import re
+import string
+import time
 import streamlit as st
 
-def create_dashboard_charts(stats, df):
-    """Create comprehensive dashboard charts"""
+# st.fragment only exists on newer Streamlit releases; fall back to a plain call
+if hasattr(st, 'fragment'):
+    fragment = st.fragment
+elif hasattr(st, 'experimental_fragment'):
+    fragment = st.experimental_fragment
+else:
+    def fragment(func=None, run_every=None):
+        if func is None:
+            return lambda f: f
+        return func
+
+# Optional navigation component, imported once with the module
+try:
+    from streamlit_option_menu import option_menu
+except ImportError:
+    option_menu = None
+
+# Looked up once rather than importing the scanner libraries on every rerun
+QR_SCANNER_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None for module in ("cv2", "pyzbar")
+)
+
+STATUS_COLORS = ['#4CAF50', '#FF9800', '#2196F3']
+
+# A plain template ships far less layout config with every figure than
+# plotly's default; the small gauge and pies also drop their margins
+CHART_TEMPLATE = 'simple_white'
+COMPACT_LAYOUT = {'template': CHART_TEMPLATE, 'margin': {'l': 0, 'r': 0, 't': 30, 'b': 0}}
+
+# Daily timelines longer than this are shown by week
+MAX_TIMELINE_BINS = 180
+
+# Below this many points SVG starts up faster than a WebGL context
+WEBGL_MIN_POINTS = 60
+
+# scanned_data codes stay ASCII: non-ASCII letters are dropped, not case-folded
+_ASCII_UPPER = bytes.maketrans(string.ascii_lowercase.encode(), string.ascii_uppercase.encode())
+
+_NON_DIGITS = re.compile(r'\D')
+
+# Keyed on (leading digits, digit count); the UK entry covers every length
+# from 12 up, so its lookup caps the count at 12
+_PHONE_FORMATS = {
+    # Nigeria (+234) → +234 902 014 9019
+    ('234', 13): lambda d: f"+234 {d[3:6]} {d[6:9]} {d[9:]}",
+    # UK (+44) → +44 7058 866 939
+    ('44', 12): lambda d: f"+44 {d[2:6]} {d[6:9]} {d[9:]}",
+    # US/Canada with country code
+    ('1', 11): lambda d: f"+1 ({d[1:4]}) {d[4:7]}-{d[7:]}",
+    # US/Canada (10 digits)
+    ('', 10): lambda d: f"({d[:3]}) {d[3:6]}-{d[6:]}",
+}
+
+@lru_cache(maxsize=1)
+def _format_minute(epoch_minute):
+    return time.strftime("%I:%M %p", time.localtime(epoch_minute * 60))
+
+def current_time_label():
+    """Current time as "HH:MM AM/PM", formatted at most once per minute"""
+    return _format_minute(int(time.time()) // 60)
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_dashboard_stats(_db, data_version):
+    return _db.get_dashboard_stats()
+
+@st.cache_resource(show_spinner=False)
+def _get_db():
+    """Database for the sidebar before a session has its own, opened once per process"""
+    from database import EventDatabase
+    return EventDatabase()
+
+def get_cached_dashboard_stats(db):
+    """Dashboard stats shared across reruns until the next write or a few seconds pass"""
+    return _cached_dashboard_stats(db, getattr(db, 'data_version', 0))
+
+def create_dashboard_charts(stats, df, timeline_freq='D'):
+    """Create comprehensive dashboard charts; timeline_freq picks daily ('D'), weekly ('W') or monthly ('M') bins"""
+    # Nothing registered yet: no chart has anything to show
+    if df.empty and stats['total'] == 0:
+        return {}
+    
+    # Reruns with the same data reuse the figures instead of rebuilding all five
+    present = frozenset(df.columns)
+    columns = [c for c in ('source_system', 'registration_time', 'status') if c in present]
+    fingerprint = (
+        len(df),
+        str(df['registration_time'].max()) if 'registration_time' in present else None,
+        tuple(columns),
+    )
+    return _build_dashboard_charts(fingerprint, stats, df[columns], timeline_freq)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _build_dashboard_charts(fingerprint, stats, _df, timeline_freq):
+    import plotly.graph_objects as go
+    import plotly.express as px
+    import numpy as np
+    import pandas as pd
     
     charts = {}
     
+    # Each figure gets its whole layout at construction: one validation pass
+    # instead of one per update_layout call
+    
+    # Both pies from one hashing pass over (source, status) pairs; each
+    # then sums its own level of the joint counts
+    present = frozenset(_df.columns)
+    pie_columns = [c for c in ('source_system', 'status') if c in present]
+    pie_counts = {}
+    if pie_columns:
+        joint = _df.value_counts(pie_columns, dropna=False)
+        for column in pie_columns:
+            pie_counts[column] = (joint.groupby(level=column, sort=False).sum()
+                                  .sort_values(ascending=False))
+    
     # 1. Registration vs Check-in Gauge
     if stats['total'] > 0:
         fig_gauge = go.Figure(go.Indicator(
@@ -28,66 +138,132 @@ def create_dashboard_charts(stats, df):
                     'value': stats['total']
                 }
             }
-        ))
-        fig_gauge.update_layout(height=300)
+        ), layout={'height': 300, **COMPACT_LAYOUT})
         charts['checkin_gauge'] = fig_gauge
     
     # 2. Hourly Check-in Chart
-    if stats.get('hourly_checkins'):
-        hours = list(stats['hourly_checkins'].keys())
-        counts = list(stats['hourly_checkins'].values())
-        
-        fig_hourly = go.Figure(data=[
-            go.Bar(x=hours, y=counts, marker_color='#4CAF50')
-        ])
-        fig_hourly.update_layout(
-            title="Check-ins by Hour (Today)",
-            xaxis_title="Hour",
-            yaxis_title="Number of Check-ins",
-            height=300
+    hourly = stats.get('hourly_checkins')
+    if hourly is not None and hourly.any():
+        # The 24 hourly buckets go to plotly as arrays, no list copies
+        fig_hourly = go.Figure(
+            go.Bar(x=np.arange(24), y=hourly, marker_color='#4CAF50'),
+            layout={
+                'title': "Check-ins by Hour (Today)",
+                'xaxis': {'title': {'text': "Hour"}},
+                'yaxis': {'title': {'text': "Number of Check-ins"}},
+                'height': 300,
+                'template': CHART_TEMPLATE
+            }
         )
         charts['hourly_chart'] = fig_hourly
     
     # 3. Registration Source (if available)
-    if 'source_system' in df.columns:
-        source_counts = df['source_system'].value_counts().reset_index()
-        source_counts.columns = ['source', 'count']
+    if 'source_system' in pie_counts:
+        source_counts = pie_counts['source_system']
         
-        fig_sources = px.pie(source_counts, values='count', names='source',
-                           title='Registration Sources',
-                           color_discrete_sequence=px.colors.sequential.Greens)
-        fig_sources.update_traces(textposition='inside', textinfo='percent+label')
+        # Plot the counts straight from the Series, no intermediate frame
+        fig_sources = go.Figure(go.Pie(labels=source_counts.index.tolist(),
+                                       values=source_counts.tolist(),
+                                       marker={'colors': px.colors.sequential.Greens},
+                                       textposition='inside', textinfo='percent+label'),
+                                layout={'title': 'Registration Sources', 'showlegend': False,
+                                        **COMPACT_LAYOUT})
         charts['sources_chart'] = fig_sources
     
     # 4. Registration Timeline
-    if 'registration_time' in df.columns and not df.empty:
-        df_copy = df.copy()
-        df_copy['date'] = pd.to_datetime(df_copy['registration_time']).dt.date
-        daily_counts = df_copy.groupby('date').size().reset_index(name='count')
+    if 'registration_time' in present and not _df.empty:
+        # Count midnight-floored datetimes directly: no frame copy, no Python date objects
+        days = pd.to_datetime(_df['registration_time'], errors='coerce').dt.floor('D')
+        daily_counts = (days.value_counts(sort=False).sort_index()
+                        .rename_axis('date').reset_index(name='count'))
         
-        fig_timeline = px.area(daily_counts, x='date', y='count',
-                             title='Registration Timeline',
-                             color_discrete_sequence=['#4CAF50'])
-        fig_timeline.update_layout(
-            xaxis_title="Date",
-            yaxis_title="Registrations",
-            height=300
-        )
+        # Long daily histories fold into weeks so the chart stays bounded
+        freq = timeline_freq
+        if freq == 'D' and len(daily_counts) > MAX_TIMELINE_BINS:
+            freq = 'W'
+        if freq != 'D':
+            daily_counts = daily_counts.set_index('date').resample(freq).sum().reset_index()
+        
+        timeline_layout = {
+            'title': 'Registration Timeline',
+            'xaxis': {'title': {'text': "Date"}},
+            'yaxis': {'title': {'text': "Registrations"}},
+            'height': 300,
+            'template': CHART_TEMPLATE
+        }
+        if len(daily_counts) < WEBGL_MIN_POINTS:
+            fig_timeline = px.area(daily_counts, x='date', y='count',
+                                 color_discrete_sequence=['#4CAF50'])
+            fig_timeline.update_layout(timeline_layout)
+        else:
+            # Long histories draw through WebGL rather than one SVG path per point
+            fig_timeline = go.Figure(go.Scattergl(x=daily_counts['date'], y=daily_counts['count'],
+                                                  fill='tozeroy', line={'color': '#4CAF50'}),
+                                     layout=timeline_layout)
         charts['timeline_chart'] = fig_timeline
     
     # 5. Status Distribution
-    if 'status' in df.columns:
-        status_counts = df['status'].value_counts().reset_index()
-        status_counts.columns = ['status', 'count']
+    if 'status' in pie_counts:
+        status_counts = pie_counts['status']
         
-        fig_status = px.pie(status_counts, values='count', names='status',
-                          title='Registration Status',
-                          color_discrete_sequence=['#4CAF50', '#FF9800', '#2196F3'])
-        fig_status.update_traces(textposition='inside', textinfo='percent+label')
+        fig_status = go.Figure(go.Pie(labels=status_counts.index.tolist(),
+                                      values=status_counts.tolist(),
+                                      marker={'colors': STATUS_COLORS},
+                                      textposition='inside', textinfo='percent+label'),
+                               layout={'title': 'Registration Status', 'showlegend': False,
+                                       **COMPACT_LAYOUT})
         charts['status_chart'] = fig_status
     
     return charts
 
+GAUGE_SVG = """
+<svg width="100%" height="56" viewBox="0 0 200 56" xmlns="http://www.w3.org/2000/svg">
+    <text x="0" y="14" font-size="12" fill="#888">Check-ins: {value}/{total}</text>
+    <rect x="0" y="22" width="200" height="20" rx="4" fill="lightgray"/>
+    <rect x="0" y="22" width="{width:.1f}" height="20" rx="4" fill="#4CAF50"/>
+    <text x="200" y="54" font-size="10" text-anchor="end" fill="#888">{percent:.1f}%</text>
+</svg>
+"""
+
+# How many dashboard charts render before the rest need a toggle
+EAGER_CHARTS = 2
+
+def _render_gauge_svg(value, total):
+    """Check-in progress as a few hundred bytes of SVG instead of a Plotly gauge"""
+    fraction = min(value / total, 1) if total else 0
+    return GAUGE_SVG.format(value=value, total=total, width=fraction * 200, percent=fraction * 100)
+
+@lru_cache(maxsize=1)
+def _use_orjson():
+    """Plotly serializes every figure sent to the browser; orjson encodes the
+    JSON (and numpy arrays natively) several times faster than the stdlib"""
+    if importlib.util.find_spec("orjson") is not None:
+        import plotly.io as pio
+        pio.json.config.default_engine = 'orjson'
+
+@fragment
+def render_dashboard(stats, df):
+    """Dashboard charts in a fragment, so other widgets' reruns don't redraw them"""
+    # Set once, here rather than at import, so pages without charts skip plotly
+    _use_orjson()
+    # The lightweight gauge by default; the Plotly one only on request
+    detailed_gauge = st.toggle("Detailed gauge", key="detailed_gauge")
+    if stats['total'] > 0 and not detailed_gauge:
+        st.markdown(_render_gauge_svg(stats['checked_in'], stats['total']), unsafe_allow_html=True)
+    
+    charts = create_dashboard_charts(stats, df)
+    if not detailed_gauge:
+        charts.pop('checkin_gauge', None)
+    
+    # Only the first charts go to the browser up front; the rest wait until
+    # asked for (a collapsed expander would still ship its figure)
+    for i, (key, fig) in enumerate(charts.items()):
+        if i >= EAGER_CHARTS and not st.toggle(
+            f"Show {key.replace('_', ' ').title()}", key=f"show_{key}"
+        ):
+            continue
+        st.plotly_chart(fig, use_container_width=True, key=key)
+
 def create_registration_form():
     """Create the registration form with all required fields"""
     
@@ -130,20 +306,25 @@ def create_registration_form():
                 return False, None
             
             # Generate scanned_data for the database
-            timestamp = int(datetime.now().timestamp())
-            scanned_data = f"REG_{first_name[:3].upper()}{last_name[:3].upper()}_{timestamp}"
+            timestamp = int(time.time())
+            prefix = (first_name[:3] + last_name[:3]).encode('ascii', 'ignore').translate(_ASCII_UPPER).decode()
+            scanned_data = f"REG_{prefix}_{timestamp}"
             
-            return True, {
-                'first_name': first_name.strip(),
-                'last_name': last_name.strip(),
-                'email': email.strip(),
-                'phone': phone.strip() if phone else '',
-                'emergency_contact': emergency_contact.strip() if emergency_contact else '',
-                'medical_notes': medical_notes.strip() if medical_notes else '',
-                'worship_team': 1 if worship_team else 0,
-                'volunteer': 1 if volunteer else 0,
-                'scanned_data': scanned_data
+            fields = {
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': email,
+                'phone': phone,
+                'emergency_contact': emergency_contact,
+                'medical_notes': medical_notes
             }
+            cleaned = {key: value.strip() if value else '' for key, value in fields.items()}
+            cleaned.update(
+                worship_team=int(bool(worship_team)),
+                volunteer=int(bool(volunteer)),
+                scanned_data=scanned_data
+            )
+            return True, cleaned
     
     return False, None
 
@@ -153,73 +334,105 @@ def format_phone(phone):
         return ""
 
     # Keep digits only
-    digits = ''.join(filter(str.isdigit, phone))
+    digits = _NON_DIGITS.sub('', phone)
 
-    # Nigeria (+234) → +234 902 014 9019
-    if digits.startswith("234") and len(digits) == 13:
-        return f"+234 {digits[3:6]} {digits[6:9]} {digits[9:]}"
+    # The formats can't overlap, so at most one lookup hits
+    n = len(digits)
+    formatter = (_PHONE_FORMATS.get((digits[:3], n))
+                 or _PHONE_FORMATS.get((digits[:2], min(n, 12)))
+                 or _PHONE_FORMATS.get((digits[:1], n))
+                 or _PHONE_FORMATS.get(('', n)))
+    if formatter:
+        return formatter(digits)
 
-    # UK (+44) → +44 7058 866 939
-    if digits.startswith("44") and len(digits) >= 12:
-        return f"+44 {digits[2:6]} {digits[6:9]} {digits[9:]}"
+    # Fallback: return original input
+    return phone
 
-    # US/Canada (10 digits)
-    if len(digits) == 10:
-        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+def format_phone_series(phones):
+    """format_phone over a whole pandas Series, for exports of many rows"""
+    raw = phones.fillna('').astype(str)
+    digits = raw.str.replace(r'\D', '', regex=True)
+    lengths = digits.str.len()
+    
+    # Unmatched numbers keep their original input, as in format_phone
+    formatted = raw.copy()
+    
+    nigeria = digits.str.startswith('234') & (lengths == 13)
+    d = digits[nigeria]
+    formatted[nigeria] = '+234 ' + d.str[3:6] + ' ' + d.str[6:9] + ' ' + d.str[9:]
+    
+    uk = digits.str.startswith('44') & (lengths >= 12)
+    d = digits[uk]
+    formatted[uk] = '+44 ' + d.str[2:6] + ' ' + d.str[6:9] + ' ' + d.str[9:]
+    
+    us = lengths == 10
+    d = digits[us]
+    formatted[us] = '(' + d.str[:3] + ') ' + d.str[3:6] + '-' + d.str[6:]
+    
+    us_code = digits.str.startswith('1') & (lengths == 11)
+    d = digits[us_code]
+    formatted[us_code] = '+1 (' + d.str[1:4] + ') ' + d.str[4:7] + '-' + d.str[7:]
+    
+    return formatted
 
-    # US/Canada with country code
-    if len(digits) == 11 and digits.startswith("1"):
-        return f"+1 ({digits[1:4]}) {digits[4:7]}-{digits[7:]}"
 
-    # Fallback: return original input
-    return phone
+SIDEBAR_HEADER_HTML = """
+<div style="text-align: center; padding: 20px 0;">
+    <h1 style="color: #4CAF50; margin: 0; font-size: 3rem;">🌿</h1>
+    <h2 style="color: white; margin: 0; font-size: 1.8rem;">ROOTED WORLD</h2>
+    <h3 style="color: #4CAF50; margin: 0; font-weight: 300; font-size: 1.2rem;">WORSHIP TOUR</h3>
+    <p style="color: #888; font-size: 0.9em; margin-top: 5px;">
+    HERE FOR WORSHIP • NIGHT OF ENCOUNTER
+    </p>
+</div>
+"""
+
+# Sent to the option_menu component as JSON, so a plain dict; never mutated
+OPTION_MENU_STYLES = {
+    "container": {"padding": "0!important", "background-color": "#262730"},
+    "icon": {"color": "#4CAF50", "font-size": "20px"},
+    "nav-link": {
+        "font-size": "16px", 
+        "text-align": "left", 
+        "margin": "0px",
+        "padding": "12px 16px"
+    },
+    "nav-link-selected": {
+        "background-color": "#4CAF50",
+        "font-weight": "600"
+    },
+}
 
+EVENT_INFO_MARKDOWN = """
+**Rooted World Tour**  
+Worship Court Lagos 
+*Sunday, 5:00 PM*  
+La Madison Place Block 2, Plot 1,Okunlade Bluewaters Scheme, Lekki 105102, Lagos Nigeria.
+"""
+
+SIDEBAR_CAPTION = "Rooted World Tour v3.0 • Mobile Registration System"
 
 def create_sidebar():
     """Create the sidebar navigation"""
     
     with st.sidebar:
         # Logo/Title
-        st.markdown("""
-        <div style="text-align: center; padding: 20px 0;">
-            <h1 style="color: #4CAF50; margin: 0; font-size: 3rem;">🌿</h1>
-            <h2 style="color: white; margin: 0; font-size: 1.8rem;">ROOTED WORLD</h2>
-            <h3 style="color: #4CAF50; margin: 0; font-weight: 300; font-size: 1.2rem;">WORSHIP TOUR</h3>
-            <p style="color: #888; font-size: 0.9em; margin-top: 5px;">
-            HERE FOR WORSHIP • NIGHT OF ENCOUNTER
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(SIDEBAR_HEADER_HTML, unsafe_allow_html=True)
         
         st.markdown("---")
         
         # Navigation
-        try:
-            from streamlit_option_menu import option_menu
-            
+        if option_menu is not None:
             selected = option_menu(
                 menu_title=None,
                 options=["Home", "Register", "Check-in", "Dashboard", "Manage", "Export"],
                 icons=["house", "person-plus", "check-circle", "bar-chart", "gear", "download"],
                 menu_icon="cast",
                 default_index=0,
-                styles={
-                    "container": {"padding": "0!important", "background-color": "#262730"},
-                    "icon": {"color": "#4CAF50", "font-size": "20px"},
-                    "nav-link": {
-                        "font-size": "16px", 
-                        "text-align": "left", 
-                        "margin": "0px",
-                        "padding": "12px 16px"
-                    },
-                    "nav-link-selected": {
-                        "background-color": "#4CAF50",
-                        "font-weight": "600"
-                    },
-                }
+                styles=OPTION_MENU_STYLES
             )
             
-        except ImportError:
+        else:
             # Fallback if option_menu is not installed
             st.warning("Install streamlit-option-menu for better navigation")
             selected = st.selectbox(
@@ -231,27 +444,10 @@ def create_sidebar():
         
         # Event Info
         st.markdown("### 📅 Current Event")
-        st.info("""
-        **Rooted World Tour**  
-        Worship Court Lagos 
-        *Sunday, 5:00 PM*  
-        La Madison Place Block 2, Plot 1,Okunlade Bluewaters Scheme, Lekki 105102, Lagos Nigeria.
-        """)
+        st.info(EVENT_INFO_MARKDOWN)
         
         # Quick Stats
-        try:
-            from database import EventDatabase
-            db = EventDatabase()
-            stats = db.get_dashboard_stats()
-            
-            st.markdown("### 📊 Quick Stats")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Total", stats.get('total', 0))
-            with col2:
-                st.metric("Checked In", stats.get('checked_in', 0))
-        except:
-            pass
+        render_quick_stats()
         
         st.markdown("---")
         
@@ -259,18 +455,38 @@ def create_sidebar():
         st.markdown("### 🔧 System Status")
         
         # Check if QR scanning is available
-        try:
-            import cv2
-            from pyzbar.pyzbar import decode
+        if QR_SCANNER_AVAILABLE:
             st.success("✅ QR Scanner: Available")
-        except ImportError:
+        else:
             st.warning("⚠️ QR Scanner: Install pyzbar")
         
+        st.toggle(
+            "⚡ High-throughput mode",
+            key="fast_mode",
+            help="Skip check-in animations and redirects when the queue is long"
+        )
+        
         st.markdown("---")
-        st.caption("Rooted World Tour v3.0 • Mobile Registration System")
+        st.caption(SIDEBAR_CAPTION)
         
         return selected
 
+@fragment(run_every=10)
+def render_quick_stats():
+    """Sidebar stats, refreshed on their own timer instead of every rerun"""
+    try:
+        db = st.session_state.db if 'db' in st.session_state else _get_db()
+        stats = get_cached_dashboard_stats(db)
+        
+        st.markdown("### 📊 Quick Stats")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total", stats.get('total', 0))
+        with col2:
+            st.metric("Checked In", stats.get('checked_in', 0))
+    except:
+        pass
+
 def create_checkin_interface():
     """Create check-in interface with scanning options"""
     